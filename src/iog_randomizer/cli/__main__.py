@@ -4,8 +4,15 @@ import os
 import random
 import sys
 
+from ..randomizer.assets import pack_asset_bundle
+from ..randomizer.batch import generate_batch
+from ..randomizer.benchmark import BENCHMARK_SETTINGS
+from ..randomizer.benchmark import run_benchmark
+from ..randomizer.benchmark import run_compression_benchmark
 from ..randomizer.iogr_rom import Randomizer
+from ..randomizer.iogr_rom import VERSION
 from ..randomizer.iogr_rom import generate_filename
+from ..randomizer.metrics import Metrics
 from ..randomizer.models.enums import Difficulty
 from ..randomizer.models.enums import Enemizer
 from ..randomizer.models.enums import Goal
@@ -14,7 +21,8 @@ from ..randomizer.models.enums import StartLocation
 from ..randomizer.models.randomizer_data import RandomizerData
 
 parser = argparse.ArgumentParser(description="Generate a randomly seeded ROM")
-parser.add_argument('-p', '--path', dest="path", type=str, required=True, help="Path to the base ROM file")
+parser.add_argument('-p', '--path', dest="path", type=str, required=False, default="",
+                    help="Path to the base ROM file (required unless packing assets or benchmarking compression)")
 parser.add_argument('-s', '--seed', dest="seed", type=int, required=False, default=random.randint(0, 999999999),
                     help="A seed number, must be a valid integer")
 parser.add_argument('-d', '--difficulty', dest="difficulty", type=Difficulty, required=False, default=Difficulty.NORMAL,
@@ -39,57 +47,198 @@ modeParser = parser.add_mutually_exclusive_group(required=False)
 modeParser.add_argument('--ohko', dest="ohko", action='store_true')
 modeParser.add_argument('--red-jewel-madness', dest="red_jewel_madness", action='store_true')
 
+batchParser = parser.add_mutually_exclusive_group(required=False)
+batchParser.add_argument('--batch', dest="batch", type=int, required=False, default=0,
+                         help="Generate this many consecutive seeds, starting from the given seed")
+batchParser.add_argument('--seed-list', dest="seed_list", type=str, required=False, default="",
+                         help="Path to a file listing one seed per line to generate as a batch")
+parser.add_argument('--workers', dest="workers", type=int, required=False, default=None,
+                    help="Number of worker processes for batch generation (defaults to the CPU count)")
+parser.add_argument('-o', '--output', dest="output", type=str, required=False, default="",
+                    help="Output folder (defaults to an iogr folder next to the base ROM)")
+
+parser.add_argument('--benchmark', dest="benchmark", action='store_true',
+                    help="Time seed generation over a fixed settings matrix and seed corpus instead of writing ROMs "
+                         "(--batch or --seed-list replace the seed corpus)")
+parser.add_argument('--benchmark-settings', dest="benchmark_settings", type=str, required=False, default="",
+                    help="Comma-separated benchmark settings to run (default all): " + ", ".join(BENCHMARK_SETTINGS))
+parser.add_argument('--benchmark-out', dest="benchmark_out", type=str, required=False, default="",
+                    help="Write the benchmark report to this JSON file")
+parser.add_argument('--benchmark-compression', dest="benchmark_compression", action='store_true',
+                    help="Time Quintet compression over the bundled compressed assets instead of generating seeds")
+parser.add_argument('--trace-memory', dest="trace_memory", action='store_true',
+                    help="Also record peak memory per benchmark phase (slows generation)")
+
+parser.add_argument('--metrics', dest="metrics", action='store_true',
+                    help="Print per-phase timings and logic counters after generating")
+parser.add_argument('--metrics-json', dest="metrics_json", type=str, required=False, default="",
+                    help="Write per-phase timings and logic counters to this JSON file")
+parser.add_argument('--log-buffer', dest="log_buffer", type=int, required=False, default=0,
+                    help="Write the last N randomizer log messages of each failed attempt to the log file")
+
+parser.add_argument('--asset-bundle', dest="asset_bundle", type=str, required=False, default="",
+                    help="Assemble from this packed asset bundle instead of the installed asm sources")
+parser.add_argument('--pack-assets', dest="pack_assets", type=str, required=False, default="",
+                    help="Pack the asm sources and data files into a single bundle file at this path, then exit")
+
 parser.set_defaults(ohko=False)
 parser.set_defaults(red_jewel_madness=False)
 
 
+def build_settings(args, seed):
+    return RandomizerData(seed=seed, difficulty=args.difficulty, goal=args.goal, logic=args.logic,
+                          statues=args.statues, start_location=args.start, enemizer=args.enemizer,
+                          dungeon_shuffle=args.dungeon_shuffle, overworld_shuffle=args.overworld_shuffle,
+                          firebird=args.firebird, ohko=args.ohko, red_jewel_madness=args.red_jewel_madness,
+                          allow_glitches=args.allow_glitches, boss_shuffle=args.boss_shuffle,
+                          open_mode=args.open_mode, z3=args.z3, race_mode=args.race)
+
+
 def main(argv):
     args = parser.parse_args(argv)
-    settings = RandomizerData(args.seed, args.difficulty, args.goal, args.logic, args.statues, args.enemizer,
-                              args.start, args.firebird, args.ohko, args.red_jewel_madness,
-                              args.allow_glitches, args.boss_shuffle, args.open_mode, args.z3, args.overworld_shuffle,
-                              args.race, args.dungeon_shuffle)
-
+    if args.pack_assets != "":
+        assets = pack_asset_bundle(args.pack_assets, VERSION)
+        print("Asset bundle created: " + os.path.basename(args.pack_assets) + " (" + str(len(assets)) + " files)")
+        return 0
+    if args.benchmark_compression:
+        return run_compression_benchmark_cli(args)
+    if args.path == "":
+        parser.error("the following arguments are required: -p/--path")
+    seeds = []
+    if args.seed_list != "":
+        f = open(args.seed_list, "r")
+        seeds = [int(line) for line in f.read().split() if line != ""]
+        f.close()
+    elif args.batch > 0:
+        seeds = [args.seed + i for i in range(args.batch)]
+    if args.benchmark:
+        return run_benchmark_cli(args, seeds)
+    if seeds:
+        return run_batch(args, seeds)
+
+    settings = build_settings(args, args.seed)
     rom_filename = generate_filename(settings, "sfc")
     spoiler_filename = generate_filename(settings, "json")
+    output_folder = get_output_folder(args)
 
     randomizer = Randomizer(args.path)
-    patch = randomizer.generate_rom(rom_filename, settings)
+    randomizer.log_buffer_size = args.log_buffer
+    randomizer.asset_bundle_path = args.asset_bundle
+    if args.metrics or args.metrics_json != "":
+        randomizer.metrics = Metrics()
+    result = randomizer.generate_rom(rom_filename, settings)
+    write_metrics(args, randomizer.metrics)
+    if not result[0]:
+        for e in result[1]:
+            print(e)
+        return 1
     if not args.race:
         spoiler = randomizer.generate_spoiler()
-        write_spoiler(spoiler, spoiler_filename, args.path)
-
-    write_patch(patch, rom_filename, args.path)
-
-
-def write_spoiler(spoiler, filename, rom_path):
-    f = open(os.path.dirname(rom_path) + os.path.sep + filename, "w+")
+        write_spoiler(spoiler, output_folder + spoiler_filename)
+
+    write_rom(result[1], output_folder + rom_filename)
+    return 0
+
+
+def run_batch(args, seeds):
+    def report(result):
+        if result["success"]:
+            print("Seed " + str(result["seed"]) + " created in " + format(result["elapsed"], ".2f") + "s (" +
+                  format(result["seeds_per_sec"], ".2f") + " seeds/sec)")
+        else:
+            print("Seed " + str(result["seed"]) + " failed: " + "; ".join(result["errors"]))
+
+    settings_list = [build_settings(args, seed) for seed in seeds]
+    summary = generate_batch(args.path, settings_list, get_output_folder(args), args.workers, True, report,
+                             args.asset_bundle)
+    print(str(summary["succeeded"]) + "/" + str(summary["seeds"]) + " seeds created in " +
+          format(summary["elapsed"], ".2f") + "s (" + format(summary["seeds_per_sec"], ".2f") + " seeds/sec)")
+    return 0 if summary["failed"] == 0 else 1
+
+
+def run_benchmark_cli(args, seeds):
+    def report(run):
+        print(run["settings"] + " seed " + str(run["seed"]) + ": " + ("ok" if run["success"] else "FAILED") + " in " +
+              format(run["elapsed"], ".2f") + "s, " + str(run["retries"]) + " retries")
+        if run["errors"]:
+            print("  " + "; ".join(run["errors"]))
+
+    settings_names = [name for name in args.benchmark_settings.split(",") if name != ""] or None
+    if settings_names:
+        for name in settings_names:
+            if name not in BENCHMARK_SETTINGS:
+                print("Unknown benchmark settings: " + name)
+                return 1
+    results = run_benchmark(args.path, settings_names, seeds or None, args.trace_memory, report)
+
+    for name, summary in results["summary"].items():
+        print(name + ": " + str(summary["succeeded"]) + "/" + str(summary["runs"]) + " ok, mean " +
+              format(summary["mean_elapsed"], ".2f") + "s, max " + format(summary["max_elapsed"], ".2f") + "s, " +
+              format(summary["mean_retries"], ".1f") + " retries")
+        for phase_name, phase in summary["phases"].items():
+            line = "  " + phase_name + ": " + format(phase["mean_time"], ".3f") + "s"
+            if "peak_memory" in phase:
+                line += ", peak " + format(phase["peak_memory"] / 1048576, ".1f") + " MiB"
+            print(line)
+    if args.benchmark_out != "":
+        f = open(args.benchmark_out, "w")
+        json.dump(results, f, indent=2)
+        f.close()
+        print("Benchmark report written: " + args.benchmark_out)
+    return 0
+
+
+def run_compression_benchmark_cli(args):
+    results = run_compression_benchmark()
+    for result in results["files"]:
+        print(result["name"] + ": " + str(result["raw_size"]) + " bytes, compat " + str(result["compat_size"]) +
+              " in " + format(result["compat_time"], ".3f") + "s, optimal " + str(result["optimal_size"]) + " in " +
+              format(result["optimal_time"], ".3f") + "s, shipped " + str(result["asset_size"]) +
+              ("" if result["roundtrip"] else " (ROUNDTRIP FAILED)"))
+    totals = results["totals"]
+    print("Total: " + str(totals["raw_size"]) + " bytes; compat " + format(totals["compat_bytes_per_sec"] / 1024, ".1f") +
+          " KiB/s, optimal " + format(totals["optimal_bytes_per_sec"] / 1024, ".1f") + " KiB/s, decompress " +
+          format(totals["decompress_bytes_per_sec"] / 1024, ".1f") + " KiB/s")
+    if args.benchmark_out != "":
+        f = open(args.benchmark_out, "w")
+        json.dump(results, f, indent=2)
+        f.close()
+        print("Benchmark report written: " + args.benchmark_out)
+    return 0 if all(result["roundtrip"] for result in results["files"]) else 1
+
+
+def write_metrics(args, metrics):
+    if metrics is None:
+        return
+    if args.metrics:
+        print(metrics.report())
+    if args.metrics_json != "":
+        f = open(args.metrics_json, "w")
+        json.dump(metrics.to_dict(), f, indent=2)
+        f.close()
+        print("Metrics written: " + args.metrics_json)
+
+
+def get_output_folder(args):
+    if args.output == "":
+        return os.path.dirname(os.path.abspath(args.path)) + os.path.sep
+    if not os.path.exists(args.output):
+        os.makedirs(args.output)
+    return args.output + os.path.sep
+
+
+def write_spoiler(spoiler, filepath):
+    f = open(filepath, "w+")
     f.write(spoiler)
     f.close()
-    print("Spoiler created: " + filename)
+    print("Spoiler created: " + os.path.basename(filepath))
 
 
-def sort_patch(val):
-    return val['index']
-
-
-def write_patch(patch, filename, rom_path):
-    original = open(rom_path, "rb")
-    randomized = open(os.path.dirname(rom_path) + os.path.sep + filename, "wb")
-    randomized.write(original.read())
-
-    original.close()
-    data = json.loads(patch)
-    data.sort(key=sort_patch)
-
-    for k in data:
-        address = int(k['address'])
-        value = bytes(k['data'])
-
-        randomized.seek(address)
-        randomized.write(value)
-    randomized.close()
-    print("Patch created: " + filename)
+def write_rom(rom_data, filepath):
+    f = open(filepath, "wb")
+    f.write(rom_data)
+    f.close()
+    print("ROM created: " + os.path.basename(filepath))
 
 
 def cli():
@@ -97,4 +246,4 @@ def cli():
 
 
 if __name__ == "__main__":
-    cli()
+    sys.exit(cli())
@@ -5,7 +5,6 @@ import tkinter.filedialog
 import tkinter.messagebox
 
 import bsdiff4
-import ips
 
 from ..randomizer.errors import RomNotFoundError
 from ..randomizer.errors import OffsetError
@@ -218,6 +217,7 @@ def generate_ROM():
         ips_smc_filename = base_filename + "_smcpatch.ips"
         ips_sfc_filename = base_filename + "_sfcpatch.ips"
         bsdiff_filename = base_filename + "_bspatch.bsdiff"
+        bps_filename = base_filename + "_bpspatch.bps"
         spoiler_filename = base_filename + "_spoiler.json"
         randomizer = Randomizer(rompath)
         if do_tests_toggle.get():
@@ -363,13 +363,14 @@ def generate_ROM():
                     cfg_dump = randomizer.generate_config_addrs()
                     write_text_file(def_dump, defs_filename, rompath)
                     write_text_file(cfg_dump, cfg_filename, rompath)
-                    ips_sfc = bytes(ips.Patch.create(randomizer.original_rom_data, patch[1]))
-                    ips_smc = bytes(
-                        ips.Patch.create(bytearray(0x200) + randomizer.original_rom_data, bytearray(0x200) + patch[1]))
+                    ips_sfc = randomizer.generate_ips_patch()
+                    ips_smc = randomizer.generate_ips_patch(0x200)
                     bspatch = bsdiff4.diff(randomizer.original_rom_data, patch[1])
+                    bps = randomizer.generate_bps_patch()
                     write_bin_file(ips_sfc, ips_sfc_filename, rompath)
                     write_bin_file(ips_smc, ips_smc_filename, rompath)
                     write_bin_file(bspatch, bsdiff_filename, rompath)
+                    write_bin_file(bps, bps_filename, rompath)
                 tkinter.messagebox.showinfo("Success!", rom_filename + " has been successfully created!")
     except OffsetError:
         tkinter.messagebox.showerror("ERROR",
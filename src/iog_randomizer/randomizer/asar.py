@@ -20,7 +20,7 @@ __all__ = ["errordata", "writtenblockdata", "mappertype", "version",
            "apiversion", "init", "reset", "patch", "maxromsize", "close",
            "geterrors", "getwarnings", "getprints", "getalllabels",
            "getlabelval", "getdefine", "getalldefines", "resolvedefines",
-           "math", "getwrittenblocks", "getmapper", "getsymbolsfile"]
+           "math", "getwrittenblocks", "getmapper", "getsymbolsfile", "Session"]
 _target_api_ver = 303
 _asar = None
 
@@ -338,6 +338,113 @@ def patch(
     return result, rom_ptr.raw[:romlen.value]
 
 
+class Session:
+    """A reusable patching context for applying many patches to one base ROM.
+
+    patch() allocates a maxromsize() buffer, copies the ROM into it and copies
+    the result back out on every call. A Session allocates its ROM buffer and
+    patch parameters once; each patch() resets the buffer from the pristine
+    base with a single memmove, only re-encodes the defines and memory files
+    that changed since the last patch, and returns the output as a memoryview of
+    the session's buffer.
+
+    The returned memoryview is only valid until the session's next patch;
+    copy it (e.g. bytes(view)) to keep the result. asar.init() must have been
+    called before creating a Session.
+    """
+
+    def __init__(self, base_rom):
+        self.buflen = maxromsize()
+        self.rom_buffer = ctypes.create_string_buffer(self.buflen)
+        self.romlen = c_int(0)
+        self.written_len = 0
+        self.params = _patchparams()
+        self.params.structsize = ctypes.sizeof(_patchparams)
+        self.params.romdata = ctypes.cast(self.rom_buffer, c_char_p)
+        self.params.buflen = self.buflen
+        self.params.romlen = ctypes.pointer(self.romlen)
+        self.params.stdincludesfile = None
+        self.params.stddefinesfile = None
+        self.params.warning_settings = (_warnsetting * 0)()
+        self.params.warning_setting_count = 0
+        self.params.override_checksum_gen = False
+        self.params.generate_checksum = False
+        self._includepaths = None
+        self.params.includepaths = (c_char_p * 0)()
+        self.params.numincludepaths = 0
+        self._defines = (_definedata * 0)()
+        self._define_items = []
+        self.params.additional_defines = self._defines
+        self.params.additional_define_count = 0
+        self._memory_items = None
+        self._memoryfiles = (_memoryfile * 0)()
+        self.set_base(base_rom)
+
+    def set_base(self, base_rom):
+        """Replace the pristine ROM that every patch starts from."""
+        if len(base_rom) > self.buflen:
+            raise ValueError("Base ROM is larger than asar's maximum ROM size")
+        self.base_len = len(base_rom)
+        self.base = ctypes.create_string_buffer(bytes(base_rom), self.base_len)
+
+    def reset(self):
+        """Restore the ROM buffer to the base ROM.
+
+        Anything a previous patch wrote past the end of the base is zeroed,
+        so the buffer matches a freshly allocated one.
+        """
+        ctypes.memmove(self.rom_buffer, self.base, self.base_len)
+        if self.written_len > self.base_len:
+            ctypes.memset(ctypes.addressof(self.rom_buffer) + self.base_len, 0,
+                          self.written_len - self.base_len)
+        self.written_len = self.base_len
+        self.romlen.value = self.base_len
+
+    def patch(self, patch_name, includepaths=[], should_reset=True,
+              additional_defines={}, memory_files={}):
+        """Apply a patch to a fresh copy of the base ROM.
+
+        Returns (success, rom_view), where rom_view is a memoryview of the
+        patched ROM in the session's buffer. Arguments are as for patch().
+        """
+        self.reset()
+        pp = self.params
+        pp.patchloc = patch_name.encode()
+
+        if includepaths != self._includepaths:
+            self._includepaths = list(includepaths)
+            pp.includepaths = (c_char_p * len(includepaths))(*includepaths)
+            pp.numincludepaths = len(includepaths)
+
+        define_items = list(additional_defines.items())
+        if len(define_items) != len(self._define_items):
+            self._defines = (_definedata * len(define_items))()
+            self._define_items = [None] * len(define_items)
+            pp.additional_defines = self._defines
+            pp.additional_define_count = len(define_items)
+        for i, item in enumerate(define_items):
+            if item != self._define_items[i]:
+                self._defines[i].name = item[0].encode()
+                self._defines[i].contents = item[1].encode()
+        self._define_items = define_items
+
+        memory_items = list(memory_files.items())
+        if memory_items != self._memory_items:
+            self._memory_items = memory_items
+            self._memoryfiles = (_memoryfile * len(memory_items))()
+            for i, (k, v) in enumerate(memory_items):
+                self._memoryfiles[i].path = k.encode()
+                self._memoryfiles[i].buffer = v
+                self._memoryfiles[i].length = len(v)
+            pp.memory_files = self._memoryfiles
+            pp.memory_file_count = len(memory_items)
+
+        pp.should_reset = should_reset
+        result = _asar.dll.asar_patch_ex(ctypes.byref(pp))
+        self.written_len = max(self.written_len, self.romlen.value)
+        return result, memoryview(self.rom_buffer).cast("B")[:self.romlen.value]
+
+
 def maxromsize():
     """Return the maximum possible size of the output ROM."""
     return _asar.dll.asar_maxromsize()
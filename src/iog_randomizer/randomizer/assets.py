@@ -0,0 +1,101 @@
+import os
+import struct
+
+from .errors import AssetBundleError
+
+# Files asar reads while assembling iogr.asr: sources, incbin data (including the sprite plugins) and text tables
+ASSET_EXTENSIONS = (".asr", ".bin", ".txt")
+ASSET_FOLDER = os.path.dirname(os.path.abspath(__file__))
+
+# Packed bundle layout (little-endian): magic, version string, file count, then for each file its
+# relative path and contents, each prefixed by its byte length
+BUNDLE_MAGIC = b"IOGRASST"
+BUNDLE_HEADER = struct.Struct("<8sH")
+BUNDLE_COUNT = struct.Struct("<I")
+BUNDLE_ENTRY = struct.Struct("<HI")
+
+# Loaded bundles, by source ("" for the package folder, otherwise the packed bundle's path)
+_bundles = {}
+
+
+# Returns the asset tree as a dict of relative path: contents, for asar.patch's memory_files.
+# Paths use "/" so they match asar's include resolution relative to iogr.asr. Loaded once per process
+# from the package folder, or from a packed bundle if bundle_path is given.
+def get_asset_bundle(version: str, bundle_path: str = ""):
+    if bundle_path not in _bundles:
+        if bundle_path == "":
+            _bundles[bundle_path] = collect_assets()
+        else:
+            _bundles[bundle_path] = read_asset_bundle(bundle_path, version)
+    return _bundles[bundle_path]
+
+
+# Reads every asset file under folder into a dict of relative path: contents
+def collect_assets(folder: str = ASSET_FOLDER):
+    assets = {}
+    for dirpath, dirnames, filenames in os.walk(folder):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith("__"))
+        for filename in sorted(filenames):
+            if filename.endswith(ASSET_EXTENSIONS):
+                filepath = os.path.join(dirpath, filename)
+                f = open(filepath, "rb")
+                assets[os.path.relpath(filepath, folder).replace(os.path.sep, "/")] = f.read()
+                f.close()
+    return assets
+
+
+# Writes assets to a single packed bundle file, tagged with the randomizer version it belongs to
+def write_asset_bundle(filepath: str, assets: dict, version: str):
+    version_bytes = version.encode()
+    f = open(filepath, "wb")
+    f.write(BUNDLE_HEADER.pack(BUNDLE_MAGIC, len(version_bytes)))
+    f.write(version_bytes)
+    f.write(BUNDLE_COUNT.pack(len(assets)))
+    for name, data in assets.items():
+        name_bytes = name.encode()
+        f.write(BUNDLE_ENTRY.pack(len(name_bytes), len(data)))
+        f.write(name_bytes)
+        f.write(data)
+    f.close()
+
+
+# Reads a packed bundle back into a dict of relative path: contents. Raises AssetBundleError if the
+# file isn't a bundle, is truncated, or was packed for a different randomizer version.
+def read_asset_bundle(filepath: str, version: str):
+    f = open(filepath, "rb")
+    data = f.read()
+    f.close()
+
+    if len(data) < BUNDLE_HEADER.size or data[:len(BUNDLE_MAGIC)] != BUNDLE_MAGIC:
+        raise AssetBundleError("Not an asset bundle: " + filepath)
+    view = memoryview(data)
+    try:
+        pos = BUNDLE_HEADER.size
+        version_len = BUNDLE_HEADER.unpack_from(data)[1]
+        bundle_version = bytes(view[pos:pos + version_len]).decode()
+        pos += version_len
+        if bundle_version != version:
+            raise AssetBundleError("Asset bundle " + filepath + " is for version " + bundle_version +
+                                   ", not " + version)
+        count = BUNDLE_COUNT.unpack_from(data, pos)[0]
+        pos += BUNDLE_COUNT.size
+        assets = {}
+        for i in range(count):
+            name_len, data_len = BUNDLE_ENTRY.unpack_from(data, pos)
+            pos += BUNDLE_ENTRY.size
+            name = bytes(view[pos:pos + name_len]).decode()
+            pos += name_len
+            if pos + data_len > len(data):
+                raise AssetBundleError("Asset bundle is truncated: " + filepath)
+            assets[name] = bytes(view[pos:pos + data_len])
+            pos += data_len
+    except struct.error:
+        raise AssetBundleError("Asset bundle is truncated: " + filepath)
+    return assets
+
+
+# Packs the package's asset folder into a bundle file for the given randomizer version
+def pack_asset_bundle(filepath: str, version: str):
+    assets = collect_assets()
+    write_asset_bundle(filepath, assets, version)
+    return assets
@@ -0,0 +1,100 @@
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .iogr_rom import Randomizer, generate_filename, load_asar
+from .models.randomizer_data import RandomizerData
+
+# Per-process randomizer, built once by the pool initializer so the base ROM
+# is read and the asar library is loaded once per worker rather than per seed
+_worker_randomizer = None
+
+
+# Each worker logs to its own file next to app.log, so workers don't truncate or interleave one another's logs
+def _init_worker(rom_path: str, asset_bundle_path: str):
+    global _worker_randomizer
+    log_folder = os.path.dirname(rom_path) + os.path.sep + "iogr" + os.path.sep + "logs" + os.path.sep
+    os.makedirs(log_folder, exist_ok=True)
+    logging.basicConfig(filename=log_folder + "app_" + str(os.getpid()) + ".log", filemode='w',
+                        format='%(message)s', level=logging.DEBUG, force=True)
+    _worker_randomizer = Randomizer(rom_path)
+    _worker_randomizer.asset_bundle_path = asset_bundle_path
+    load_asar()
+
+
+# Generates one seed in a worker and writes its ROM (and spoiler) to disk,
+# returning only a small summary so ROM data never crosses the process boundary.
+# Any error in a seed is reported as that seed failing rather than ending the batch.
+def _generate_seed(settings: RandomizerData, output_folder: str, write_spoiler: bool):
+    start_time = time.perf_counter()
+    rom_filename = generate_filename(settings, "sfc")
+    try:
+        result = _worker_randomizer.generate_rom(rom_filename, settings)
+    except RecursionError:
+        return {"seed": settings.seed, "success": False, "errors": ["Max number of seed adjustments exceeded"],
+                "elapsed": time.perf_counter() - start_time}
+    except Exception as e:
+        _worker_randomizer.logger.exception("Seed " + str(settings.seed) + " failed")
+        return {"seed": settings.seed, "success": False, "errors": [type(e).__name__ + ": " + str(e)],
+                "elapsed": time.perf_counter() - start_time}
+    if not result[0]:
+        return {"seed": settings.seed, "success": False, "errors": [str(e) for e in result[1]],
+                "elapsed": time.perf_counter() - start_time}
+
+    files = [output_folder + rom_filename]
+    f = open(files[0], "wb")
+    f.write(result[1])
+    f.close()
+    if write_spoiler and not settings.race_mode:
+        files.append(output_folder + generate_filename(settings, "json"))
+        f = open(files[1], "w")
+        f.write(_worker_randomizer.generate_spoiler())
+        f.close()
+    return {"seed": settings.seed, "success": True, "files": files, "elapsed": time.perf_counter() - start_time}
+
+
+# Generates a ROM for each settings object across a pool of worker processes.
+# Results are written to output_folder as each seed finishes; progress_callback,
+# if given, receives each seed's summary dict (with running throughput) as it arrives.
+# asset_bundle_path, if given, is a packed asset bundle for the workers to assemble from.
+# Returns a summary of the whole batch.
+def generate_batch(rom_path: str, settings_list: list, output_folder: str = "", workers: int = None,
+                   write_spoilers: bool = True, progress_callback=None, asset_bundle_path: str = ""):
+    if output_folder == "":
+        output_folder = os.path.dirname(rom_path) + os.path.sep + "iogr" + os.path.sep
+    elif output_folder[-1] != os.path.sep:
+        output_folder += os.path.sep
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+
+    results = []
+    succeeded = 0
+    start_time = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(rom_path, asset_bundle_path)) as executor:
+        futures = {executor.submit(_generate_seed, settings, output_folder, write_spoilers): i
+                   for i, settings in enumerate(settings_list)}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:  # E.g. the ROM couldn't be written, or the worker died
+                result = {"seed": settings_list[futures[future]].seed, "success": False,
+                          "errors": [type(e).__name__ + ": " + str(e)], "elapsed": 0.0}
+            result["index"] = futures[future]
+            results.append(result)
+            if result["success"]:
+                succeeded += 1
+            elapsed = time.perf_counter() - start_time
+            result["seeds_per_sec"] = len(results) / elapsed if elapsed > 0 else 0.0
+            if progress_callback is not None:
+                progress_callback(result)
+
+    elapsed = time.perf_counter() - start_time
+    return {
+        "seeds": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "elapsed": elapsed,
+        "seeds_per_sec": len(results) / elapsed if elapsed > 0 else 0.0,
+        "results": sorted(results, key=lambda r: r["index"]),
+    }
@@ -0,0 +1,157 @@
+import glob
+import os
+import platform
+import time
+import tracemalloc
+
+from . import quintet_comp
+from .assets import ASSET_FOLDER
+from .iogr_rom import Randomizer, VERSION, generate_filename
+from .metrics import Metrics
+from .models.enums import *
+from .models.randomizer_data import RandomizerData
+
+# Representative settings combinations; each is a set of RandomizerData keyword overrides
+BENCHMARK_SETTINGS = {
+    "default": {},
+    "beatable": {"logic": Logic.BEATABLE},
+    "chaos": {"logic": Logic.CHAOS},
+    "town_coupled": {"town_shuffle": True, "coupled_exits": True},
+    "dungeon_coupled": {"dungeon_shuffle": True, "coupled_exits": True},
+    "town_dungeon_uncoupled": {"town_shuffle": True, "dungeon_shuffle": True},
+    "town_dungeon_orbs": {"town_shuffle": True, "dungeon_shuffle": True, "coupled_exits": True, "orb_rando": True},
+    "darkrooms": {"darkrooms": DarkRooms.MANYCURSED},
+    "enemizer": {"enemizer": Enemizer.INSANE},
+    "overworld": {"overworld_shuffle": True, "start_location": StartLocation.UNSAFE},
+    "everything": {"logic": Logic.CHAOS, "town_shuffle": True, "dungeon_shuffle": True, "overworld_shuffle": True,
+                   "orb_rando": True, "darkrooms": DarkRooms.SOMECURSED, "enemizer": Enemizer.FULL,
+                   "boss_shuffle": True, "flute": FluteOpt.SHUFFLE},
+}
+
+# Fixed seed corpus, so runs are comparable across versions
+BENCHMARK_SEEDS = [1, 2, 3, 4, 5, 12345, 271828, 314159, 8675309, 123456789]
+
+
+# Generates every (settings, seed) combination on one Randomizer, timing each phase of generate_rom.
+# With trace_memory, peak traced memory is also recorded per phase; tracing slows generation down,
+# so don't compare times between traced and untraced runs.
+# progress_callback, if given, receives each run's result dict as it finishes. A run that fails or raises
+# is recorded with success False and its errors, and the rest of the matrix still runs.
+# Returns a JSON-serializable report: per-run results and per-settings averages.
+def run_benchmark(rom_path: str, settings_names: list = None, seeds: list = None, trace_memory: bool = False,
+                  progress_callback=None):
+    if settings_names is None:
+        settings_names = list(BENCHMARK_SETTINGS)
+    if seeds is None:
+        seeds = BENCHMARK_SEEDS
+    randomizer = Randomizer(rom_path)
+
+    runs = []
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        for name in settings_names:
+            for seed in seeds:
+                settings = RandomizerData(seed=seed, **BENCHMARK_SETTINGS[name])
+                randomizer.metrics = Metrics(trace_memory)
+                start_time = time.perf_counter()
+                try:
+                    result = randomizer.generate_rom(generate_filename(settings, "sfc"), settings)
+                    success = bool(result[0])
+                    errors = [] if success else [str(e) for e in result[1]]
+                except RecursionError:
+                    randomizer.metrics.end_phase()
+                    success = False
+                    errors = ["Max number of seed adjustments exceeded"]
+                except Exception as e:
+                    randomizer.metrics.end_phase()
+                    randomizer.logger.exception("Seed " + str(seed) + " failed")
+                    success = False
+                    errors = [type(e).__name__ + ": " + str(e)]
+                run = {"settings": name, "seed": seed, "success": success, "errors": errors,
+                       "elapsed": time.perf_counter() - start_time,
+                       "retries": randomizer.metrics.counters.get("retries", 0), "phases": randomizer.metrics.phases,
+                       "counters": randomizer.metrics.counters, "retry_reasons": randomizer.metrics.retry_reasons}
+                runs.append(run)
+                if progress_callback is not None:
+                    progress_callback(run)
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+        randomizer.metrics = None
+
+    return {
+        "version": VERSION,
+        "python": platform.python_version(),
+        "trace_memory": trace_memory,
+        "seeds": seeds,
+        "summary": {name: summarize_runs([run for run in runs if run["settings"] == name]) for name in settings_names},
+        "runs": runs,
+    }
+
+
+# Averages a list of benchmark runs: elapsed time, retries and per-phase time, plus max peak memory
+def summarize_runs(runs: list):
+    summary = {
+        "runs": len(runs),
+        "succeeded": len([run for run in runs if run["success"]]),
+        "mean_elapsed": sum(run["elapsed"] for run in runs) / len(runs) if runs else 0.0,
+        "max_elapsed": max([run["elapsed"] for run in runs], default=0.0),
+        "mean_retries": sum(run["retries"] for run in runs) / len(runs) if runs else 0.0,
+        "phases": {},
+    }
+    for run in runs:
+        for phase_name, phase in run["phases"].items():
+            if phase_name not in summary["phases"]:
+                summary["phases"][phase_name] = {"mean_time": 0.0}
+                if "peak_memory" in phase:
+                    summary["phases"][phase_name]["peak_memory"] = 0
+            summary_phase = summary["phases"][phase_name]
+            summary_phase["mean_time"] += phase["time"] / len(runs)
+            if "peak_memory" in phase:
+                summary_phase["peak_memory"] = max(summary_phase["peak_memory"], phase["peak_memory"])
+    return summary
+
+
+# Times Quintet compression over the bundled *_comp.bin assets: each is decompressed, then compressed
+# again in the compatible and optimal modes, best of repeat runs. Each result is checked to decompress
+# back to the same data. Returns a JSON-serializable report with per-file results and overall throughput.
+def run_compression_benchmark(folder: str = ASSET_FOLDER, repeat: int = 3):
+    files = []
+    for filepath in sorted(glob.glob(os.path.join(folder, "*_comp.bin"))):
+        f = open(filepath, "rb")
+        asset = f.read()
+        f.close()
+        result = {"name": os.path.basename(filepath), "asset_size": len(asset)}
+        result["decompress_time"], data = time_best(repeat, quintet_comp.decompress, asset)
+        result["raw_size"] = len(data)
+        result["compat_time"], compat = time_best(repeat, quintet_comp.compress, data)
+        result["optimal_time"], optimal = time_best(repeat, quintet_comp.compress, data, True)
+        result["compat_size"] = len(compat)
+        result["optimal_size"] = len(optimal)
+        result["roundtrip"] = quintet_comp.decompress(compat) == data and quintet_comp.decompress(optimal) == data
+        files.append(result)
+
+    raw_size = sum(result["raw_size"] for result in files)
+    totals = {"raw_size": raw_size, "asset_size": sum(result["asset_size"] for result in files)}
+    for mode in ["compat", "optimal"]:
+        mode_time = sum(result[mode + "_time"] for result in files)
+        totals[mode + "_size"] = sum(result[mode + "_size"] for result in files)
+        totals[mode + "_bytes_per_sec"] = raw_size / mode_time if mode_time > 0 else 0.0
+    decompress_time = sum(result["decompress_time"] for result in files)
+    totals["decompress_bytes_per_sec"] = raw_size / decompress_time if decompress_time > 0 else 0.0
+    return {"version": VERSION, "python": platform.python_version(), "repeat": repeat, "files": files,
+            "totals": totals}
+
+
+# Runs func(*args) repeat times, returning the fastest time and the last result
+def time_best(repeat, func, *args):
+    best_time = None
+    result = None
+    for i in range(max(repeat, 1)):
+        start_time = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start_time
+        if best_time is None or elapsed < best_time:
+            best_time = elapsed
+    return best_time, result
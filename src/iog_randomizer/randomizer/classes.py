@@ -1,8 +1,12 @@
 import itertools
 import random
 import time
+from collections import Counter, deque
 from datetime import datetime
 
+from .graph import GraphNode, NodeSet, strongly_connected_components
+from .inventory import Inventory, compile_requirements, has_requirements
+from .metrics import count_calls
 from .models.enums import *
 from .models.randomizer_data import RandomizerData
 
@@ -13,31 +17,73 @@ MAX_CYCLES = 200
 
 class World:
     # Severity: 0 = error/breakpoint, 1 = warning, 2 = info, 3 = verbose.
-    def log(self, message, severity=0):
+    # If args are given, message is a %-format string that's only formatted if the message is used.
+    # Messages go to errorlog (warnings and errors), stdout (up to printlevel) and log_buffer (if set).
+    def log(self, message, severity=0, args=()):
+        if severity > self.log_level:
+            return
         prefixes = ["Error: ", "Warning: ", "", ""]
         prefix = prefixes[severity]
+        if args:
+            message = message % args
         if severity <= 1:
             self.errorlog.append(prefix + message)
         if severity <= self.printlevel:
             print(prefix + message)
+        if self.log_buffer is not None:
+            self.log_buffer.append(prefix + message)
         return
 
+    # Sets how much is printed, and optionally keeps the last buffer_size messages of any severity
+    # in log_buffer for dump_log_buffer. log_level is the highest severity anything will use, so
+    # calls above it (and callers guarding on it) skip building their messages.
+    def set_log_level(self, printlevel=-1, buffer_size=0):
+        self.printlevel = printlevel
+        self.log_buffer = deque(maxlen=buffer_size) if buffer_size > 0 else None
+        self.log_level = 3 if self.log_buffer is not None else max(printlevel, 1)
+
+    # Returns the buffered messages, oldest first, e.g. to write out after a failure
+    def dump_log_buffer(self):
+        if self.log_buffer is None:
+            return []
+        return list(self.log_buffer)
+
     # Aliases, if using them is clearer to you
-    def verbose(self, message):
-        return self.log(message, 3)
+    def verbose(self, message, *args):
+        if self.log_level >= 3:
+            self.log(message, 3, args)
 
-    def info(self, message):
-        return self.log(message, 2)
+    def info(self, message, *args):
+        if self.log_level >= 2:
+            self.log(message, 2, args)
 
-    def warn(self, message):
-        return self.log(message, 1)
+    def warn(self, message, *args):
+        return self.log(message, 1, args)
 
-    def error(self, message):
-        self.log(message, 0)
+    def error(self, message, *args):
+        self.log(message, 0, args)
         if self.break_on_error:
             breakpoint()
         return
 
+    # Starts timing a phase of randomization, if a Metrics object is attached
+    def start_phase(self, name):
+        if self.metrics is not None:
+            self.metrics.start_phase(name)
+
+    # Adds to a metrics counter, if a Metrics object is attached
+    def count_metric(self, name):
+        if self.metrics is not None:
+            self.metrics.count(name)
+
+    # Times phases and counts calls to the main logic methods in metrics from now on
+    def attach_metrics(self, metrics):
+        self.metrics = metrics
+        for method_name, counter in [["traverse", "traversals"], ["check_edge", "edge_checks"],
+                                     ["progression_list", "progression_checks"],
+                                     ["forward_fill", "forward_fill_attempts"], ["make_room", "make_room_calls"]]:
+            count_calls(self, method_name, metrics, counter)
+
     # Some basic validations for profiling
     def validate(self):
         val_messages = []
@@ -86,27 +132,27 @@ class World:
         if location == -1:
             return False
         elif not test and self.item_locations[location][2]:
-            self.verbose("Tried to place an item in a full location: " + str(self.item_pool[item][3]) + " " + str(
-                self.item_locations[location][6]))
+            self.verbose("Tried to place an item in a full location: %s %s", self.item_pool[item][3],
+                         self.item_locations[location][6])
             return False
         elif not test and item in self.item_locations[location][4] and not override_restrictions:
-            self.verbose("Tried to place item in a restricted location: " + str(self.item_pool[item][3]) + " " + str(
-                self.item_locations[location][6]))
+            self.verbose("Tried to place item in a restricted location: %s %s", self.item_pool[item][3],
+                         self.item_locations[location][6])
             return False
         elif test:
             return True
 
         self.item_pool[item][0] -= 1
         self.item_locations[location][2] = True
-        self.item_locations[location][3] = item
+        self.set_location_item(location, item)
 
-        self.verbose("  " + str(self.item_pool[item][3]) + " -> " + str(self.item_locations[location][6]))
+        self.verbose("  %s -> %s", self.item_pool[item][3], self.item_locations[location][6])
 
         if self.is_accessible(self.item_locations[location][0]):
             self.items_collected.append(item)
             self.open_locations[self.item_locations[location][7]].remove(location)
 
-        self.placement_log.append([item, location])
+        self.placement_log[location] = [item, location]
         return True
 
     # Removes an assigned item and returns it to item pool
@@ -116,10 +162,10 @@ class World:
 
         item = self.item_locations[location][3]
         self.item_locations[location][2] = False
-        self.item_locations[location][3] = 0
+        self.set_location_item(location, 0)
         self.item_pool[item][0] += 1
 
-        self.verbose("  " + str(self.item_pool[item][3]) + "<-" + str(self.item_locations[location][6]) + " removed")
+        self.verbose("  %s<-%s removed", self.item_pool[item][3], self.item_locations[location][6])
 
         if self.is_accessible(self.item_locations[location][0]):
             if item in self.items_collected:
@@ -128,12 +174,33 @@ class World:
             if location not in self.open_locations[pool]:
                 self.open_locations[pool].append(location)
 
-        for x in self.placement_log:
-            if x[1] == location:
-                self.placement_log.remove(x)
+        self.placement_log.pop(location, None)
 
         return item
 
+    # Sets the item at a location, keeping the item -> locations index in step
+    def set_location_item(self, location, item):
+        if self.item_placements is not None:
+            old_item = self.item_locations[location][3]
+            if old_item in self.item_placements:
+                self.item_placements[old_item].discard(location)
+            if item not in self.item_placements:
+                self.item_placements[item] = NodeSet()
+            self.item_placements[item].add(location)
+        self.item_locations[location][3] = item
+
+    # Returns the number of locations holding an item (item 0 for empty locations), from an
+    # item -> locations index built on first use and kept up by set_location_item
+    def count_placed(self, item):
+        if self.item_placements is None:
+            self.item_placements = {}
+            for loc in self.item_locations:
+                loc_item = self.item_locations[loc][3]
+                if loc_item not in self.item_placements:
+                    self.item_placements[loc_item] = NodeSet()
+                self.item_placements[loc_item].add(loc)
+        return len(self.item_placements.get(item, ()))
+
     # Map a type/item/location to a shuffle pool ID.
     # Returns pool 0 if a type/item/location isn't shuffled.
     def get_pool_id(self, type=-1, item=-1, loc=-1):
@@ -178,11 +245,9 @@ class World:
             if not types or self.item_pool[x][1] in types:
                 if not progress_type or progress_type == self.item_pool[x][5]:
                     if not shuffled_only or self.item_pool[x][6] > 0:
-                        for _ in range(self.item_pool[x][0]):
-                            item_list.append(x)
+                        item_list.extend([x] * self.item_pool[x][0])
                         if incl_placed:
-                            for _ in [loc for loc in self.item_locations if self.item_locations[loc][3] == x]:
-                                item_list.append(x)
+                            item_list.extend([x] * self.count_placed(x))
         return item_list
 
     # Get list of items shuffled with given or all types, of any or all progression types.
@@ -196,11 +261,9 @@ class World:
             if self.item_pool[x][6] in pools:
                 if not progress_type or progress_type == self.item_pool[x][5]:
                     if not shuffled_only or self.item_pool[x][6] > 0:
-                        for _ in range(self.item_pool[x][0]):
-                            item_list.append(x)
+                        item_list.extend([x] * self.item_pool[x][0])
                         if incl_placed:
-                            for _ in [loc for loc in self.item_locations if self.item_locations[loc][3] == x]:
-                                item_list.append(x)
+                            item_list.extend([x] * self.count_placed(x))
         return item_list
 
     # Returns all item locations
@@ -224,13 +287,71 @@ class World:
             return True
         elif len(sublist) > len(list):
             return False
-        l = list[:]
-        for x in sublist:
-            if x in l:
-                l.remove(x)
-            else:
-                return False
-        return True
+        return has_requirements(Counter(list), Counter(sublist).items())
+
+    # Returns an edge's requirements as (item, total qty) pairs, compiled on first use
+    def edge_requirements(self, edge):
+        reqs = self.edge_reqs.get(edge)
+        if reqs is None:
+            reqs = compile_requirements(self.logic[edge][4])
+            self.edge_reqs[edge] = reqs
+        return reqs
+
+    # Replaces the collected items, keeping each edge's unmet requirement count in step with them
+    def set_items_collected(self, items=[]):
+        self.items_collected = Inventory(items, self.update_item_counts)
+        self.index_requirements()
+        self.count_inventory()
+
+    # Rebuilds the item -> requiring edges index and each edge's count of unmet requirements.
+    # Built once the logic is set up in initialize; delete_objects keeps it current after that.
+    def index_requirements(self):
+        self.req_edges = {}
+        self.unmet_reqs = {}
+        for edge in self.logic:
+            self.index_edge(edge)
+
+    # Adds one edge to the requirement index, e.g. after its requirements were edited
+    def index_edge(self, edge):
+        counts = self.items_collected.counts
+        unmet = 0
+        for item, qty in self.edge_requirements(edge):
+            if item not in self.req_edges:
+                self.req_edges[item] = []
+            self.req_edges[item].append([edge, qty])
+            if counts.get(item, 0) < qty:
+                unmet += 1
+        self.unmet_reqs[edge] = unmet
+
+    # Removes one edge from the requirement index and forgets its compiled requirements
+    def unindex_edge(self, edge):
+        if edge in self.unmet_reqs:
+            for item, qty in self.edge_requirements(edge):
+                self.req_edges[item] = [r for r in self.req_edges[item] if r[0] != edge]
+            del self.unmet_reqs[edge]
+        self.edge_reqs.pop(edge, None)
+        self.blocked_edges.pop(edge, None)
+
+    # Called by items_collected when an item's count changes
+    def update_item_counts(self, item, old_ct, new_ct):
+        self.update_unmet_reqs(item, old_ct, new_ct)
+        if self.takes_inventory(item):
+            dest_ct = self.item_destinations.counts.get(item, 0)
+            self.inventory_size += max(new_ct - dest_ct, 0) - max(old_ct - dest_ct, 0)
+
+    # Called by item_destinations when an item's count changes
+    def update_destination_counts(self, item, old_ct, new_ct):
+        if self.takes_inventory(item):
+            collected_ct = self.items_collected.counts.get(item, 0)
+            self.inventory_size += max(collected_ct - new_ct, 0) - max(collected_ct - old_ct, 0)
+
+    # Updates only the edges that require an item whose collected count changed
+    def update_unmet_reqs(self, item, old_ct, new_ct):
+        for edge, qty in self.req_edges.get(item, []):
+            if old_ct < qty <= new_ct:
+                self.unmet_reqs[edge] -= 1
+            elif new_ct < qty <= old_ct:
+                self.unmet_reqs[edge] += 1
 
     # Returns graph node of an item location
     def location_node(self, location_id=-1):
@@ -252,7 +373,7 @@ class World:
     def is_accessible(self, node_id=-1):
         if node_id not in self.graph:
             return False
-        elif self.graph[node_id][0]:
+        elif self.graph[node_id].visited:
             return True
         else:
             return False
@@ -260,12 +381,14 @@ class World:
     # Zeroes out accessible flags for all world regions
     def unsolve(self, reset_graph=False):
         for x in self.graph:
-            self.graph[x][0] = False
+            self.graph[x].visited = False
             if reset_graph:
-                self.graph[x][4] = 0
-                self.graph[x][8].clear()
-                self.graph[x][9].clear()
-                self.graph[x][10] = self.graph[x][1][:]
+                self.graph[x].form_access = 0
+                self.graph[x].from_nodes.clear()
+                self.graph[x].ds_nodes.clear()
+                self.graph[x].to_nodes = self.graph[x].links.copy()
+        if reset_graph:
+            self.graph_version += 1
         for x in self.logic:
                 self.logic[x][0] = 0
         return True
@@ -275,8 +398,9 @@ class World:
         self.visited.clear()
         self.items_collected.clear()
         self.item_destinations.clear()
-        self.open_locations = [[] for _ in range(self.item_pool_count)]
+        self.open_locations = [NodeSet() for _ in range(self.item_pool_count)]
         self.open_edges = []
+        self.blocked_edges.clear()  # Clearing items_collected above already reset unmet_reqs
         self.unsolve(reset_graph)
         return True
 
@@ -289,42 +413,55 @@ class World:
     def traverse(self, to_visit=[], test=False):
         self.verbose(" Beginning traversal...")
         visited = []
+        visited_set = set()
+        unvisited = []  # Visited nodes not marked accessible, i.e. those found in a test traversal
         new_items = []
-        if not to_visit:
-            to_visit.append(0)
-        while to_visit:
-            node = to_visit.pop(0)
+        queue = deque(to_visit) if to_visit else deque([0])
+        queued = Counter(queue)  # How many times each node is in queue
+        to_visit.clear()
+        while queue:
+            node = queue.popleft()
+            queued[node] -= 1
             visited.append(node)
-            self.verbose("  Visiting node " + str(node) + " " + str(self.graph[node][5]))
+            visited_set.add(node)
+            graph_node = self.graph[node]
+            self.verbose("  Visiting node %s %s", node, graph_node.name)
             # If we haven't been here yet...
-            if not self.graph[node][0]:
+            if not graph_node.visited:
                 # Get the newly-accessible items and record open item/ability locations
                 new_items += self.visit_node(node, test)
+                if not graph_node.visited:
+                    unvisited.append(node)
                 # Queue up newly-accessible nodes to visit
-                for x in self.graph[node][1]:
-                    if x != node and x not in to_visit + visited:
-                        to_visit.insert(0, x)
-                        self.verbose("  -Found node " + str(x) + " " + str(self.graph[x][5]))
+                for x in graph_node.links:
+                    if x != node and not queued[x] and x not in visited_set:
+                        queue.appendleft(x)
+                        queued[x] += 1
+                        self.verbose("  -Found node %s %s", x, self.graph[x].name)
             # Propagate form access
             if not test:
-                access_mode = self.graph[node][4]
+                access_mode = graph_node.form_access
                 if node in self.txform_nodes:
                     access_mode |= (0x01|0x02|0x04)
-                self.update_ds_access([node], access_mode, self.graph[node][9])
+                self.update_ds_access([node], access_mode, graph_node.ds_nodes)
             # If we've run out of nodes to visit, check if logic has opened up any new nodes
-            if not to_visit:
-                open_edges = self.get_open_edges(visited, True)
+            if not queue:
+                open_edges = self.filter_open_edges(unvisited, visited_set, True)
                 bad_edges = []
                 # self.verbose(" All known nodes checked. Traversing edges...")
                 for edge in open_edges:
                     origin = self.logic[edge][1]
                     dest = self.logic[edge][2]
-                    if self.check_edge(edge, [], not test, self.graph[origin][4]):
+                    if self.edge_still_blocked(edge):
+                        bad_edges.append(edge)
+                    elif self.check_edge(edge, [], not test, self.graph[origin].form_access):
                         self.logic[edge][0] = 1
-                        if dest not in to_visit:
-                            to_visit.append(dest)
-                            self.verbose("  -Found node " + str(dest) + " " + str(self.graph[dest][5]))
+                        if not queued[dest]:
+                            queue.append(dest)
+                            queued[dest] += 1
+                            self.verbose("  -Found node %s %s", dest, self.graph[dest].name)
                     else:
+                        self.block_edge(edge)
                         bad_edges.append(edge)
                 if not test:
                     self.open_edges = bad_edges
@@ -334,25 +471,50 @@ class World:
     # either are locked or terminate outside of nodes.
     # include_redundant to include edges whose destination is already traversed.
     def get_open_edges(self, nodes=[], include_redundant=False):
+        unvisited = [x for x in nodes if not self.is_accessible(x)]
+        return self.filter_open_edges(unvisited, set(nodes), include_redundant)
+
+    # get_open_edges for callers that already know which of the nodes aren't accessible
+    def filter_open_edges(self, unvisited, node_set, include_redundant=False):
         test_edges = self.open_edges[:]
         open_edges = []
-        for x in nodes:
-            if not self.is_accessible(x):
-                test_edges += self.graph[x][12]
+        for x in unvisited:
+            test_edges += self.graph[x].origin_edges
+        seen_edges = set()
         for edge in test_edges:
+            if edge in seen_edges:
+                continue
+            seen_edges.add(edge)
             origin = self.logic[edge][1]
             dest = self.logic[edge][2]
-            if (self.logic[edge][0] >= 0) and (edge not in open_edges) and (not self.is_accessible(dest) or self.graph[origin][4] != self.graph[dest][4] or include_redundant) and (dest not in nodes or self.logic[edge][0] == 0):
+            if (self.logic[edge][0] >= 0) and (not self.is_accessible(dest) or self.graph[origin].form_access != self.graph[dest].form_access or include_redundant) and (dest not in node_set or self.logic[edge][0] == 0):
                 open_edges.append(edge)
         return open_edges
 
+    # Records the origin's form access when an edge with its item requirements met fails its
+    # traversal check, since that's all the form and DS checks depend on
+    def block_edge(self, edge):
+        if not self.unmet_reqs[edge]:
+            self.blocked_edges[edge] = self.graph[self.logic[edge][1]].form_access
+
+    # Returns whether an edge is certain to fail its traversal check again: it's missing items,
+    # or it was blocked by form access that hasn't changed since. Lets traverse skip most of the
+    # frontier on each pass.
+    def edge_still_blocked(self, edge):
+        if self.logic[edge][0] > 0:
+            return False
+        if self.unmet_reqs[edge]:
+            return True
+        form_access = self.blocked_edges.get(edge)
+        return form_access is not None and self.graph[self.logic[edge][1]].form_access == form_access
+
     # Visit a node, update graph info, return new items collected
     def visit_node(self, node, test=False):
-        if not test and not self.graph[node][0]:
-            self.graph[node][0] = True
+        if not test and not self.graph[node].visited:
+            self.graph[node].visited = True
             self.visited.append(node)
-            self.item_destinations += self.graph[node][6]
-            self.open_edges += self.graph[node][12]
+            self.item_destinations += self.graph[node].items_to_remove
+            self.open_edges += self.graph[node].origin_edges
         return self.collect_items(node, test)
 
     # Collect all items in given node
@@ -360,15 +522,15 @@ class World:
         if node not in self.graph:
             return False
         items_found = []
-        for location in self.graph[node][11]:
+        for location in self.graph[node].locations:
             if self.item_locations[location][2]:
                 items_found.append(self.item_locations[location][3])
                 if not test:
                     self.items_collected.append(self.item_locations[location][3])
-                self.verbose("  -Got item " + str(self.item_locations[location][3]) + " " + str(
-                    self.item_pool[self.item_locations[location][3]][3]) + " from loc " + str(location) + " " + str(
-                    self.item_locations[location][6]).strip() + " in node " + str(node) + " " + str(
-                    self.graph[node][5]).strip())
+                if self.log_level >= 3:
+                    self.verbose("  -Got item %s %s from loc %s %s in node %s %s", self.item_locations[location][3],
+                                 self.item_pool[self.item_locations[location][3]][3], location,
+                                 str(self.item_locations[location][6]).strip(), node, str(self.graph[node].name).strip())
             elif not test:
                 self.open_locations[self.item_locations[location][7]].append(location)
                 # self.verbose("  -Found empty loc "+str(location)+" "+str(self.item_locations[location][6]))
@@ -462,7 +624,7 @@ class World:
                 else:
                     loc_quarantine[pool].append(location)
             if not filled:
-                self.verbose("Not enough room to place item " + str(item))
+                self.verbose("Not enough room to place item %s", item)
                 if not test:
                     for loc in filled_locations:
                         self.unfill_item(loc)
@@ -475,29 +637,17 @@ class World:
         if not edge:
             return []
 
+        # Walk the requirements in order, so collected items satisfy the earliest requirements first
+        counts = self.items_collected.counts
+        used = {}
         prereq = []
-        for req in self.logic[edge][4]:
-            item = req[0]
-            ct = req[1]
-            i = 0
-            while i < ct:
-                prereq.append(item)
-                i += 1
-
-        if not self.items_collected:
-            return prereq
-
-        prereq_new = []
-        items_new = self.items_collected[:]
-
-        while prereq:
-            x = prereq.pop(0)
-            if x in items_new:
-                items_new.remove(x)
-            else:
-                prereq_new.append(x)
-
-        return prereq_new
+        for item, ct in self.logic[edge][4]:
+            if ct <= 0:
+                continue
+            take = min(max(counts.get(item, 0) - used.get(item, 0), 0), ct)
+            used[item] = used.get(item, 0) + take
+            prereq.extend([item] * (ct - take))
+        return prereq
 
     # Returns list of item combinations that grant progression
     # Returns progression list in the following categories: [[available],[not enough room],[too many inventory items]]
@@ -505,34 +655,56 @@ class World:
         if not open_edges:
             open_edges = self.get_open_edges()
         all_items = [item for item in self.list_pooled_items(types=[], shuffled_only=True) if self.item_pool[item][7] <= penalty_threshold]
+        all_item_counts = Counter(all_items)
         prereq_list = [[], [], []]  # [[available],[not enough room],[too many inventory items]]
         ds_list = []
 
+        all_open_locs = []
+        for locpool in self.open_locations:
+            all_open_locs.extend(locpool)
+
+        # Memos for this cycle, since many edges share prerequisites or destinations: which list each
+        # prerequisite (as ordered) was sorted into, whether each prerequisite multiset is in the pool,
+        # test traversals by destination, and inventory sizes by prerequisite multiset and destination.
+        # Dry-run fills aren't memoized, as each one draws from the seed's RNG.
+        listed_prereqs = [set(), set(), set()]
+        pooled_prereqs = {}
+        traversals = {}
+        inventory_sizes = {}
         for edge in open_edges:
             prereq = self.items_needed(edge)
-            if prereq and prereq not in prereq_list[0] and self.is_sublist(all_items, prereq):
-                all_open_locs = []
-                for locpool in self.open_locations:
-                    all_open_locs.extend(locpool)
-                if prereq not in prereq_list[1] and not self.forward_fill(prereq, all_open_locs, True,
-                                                                          self.logic_mode == "Chaos"):
+            if not prereq:
+                continue
+            prereq_key = tuple(prereq)
+            prereq_multiset = tuple(sorted(prereq))
+            if prereq_multiset not in pooled_prereqs:
+                pooled_prereqs[prereq_multiset] = has_requirements(all_item_counts, Counter(prereq).items())
+            if prereq_key not in listed_prereqs[0] and pooled_prereqs[prereq_multiset]:
+                if prereq_key not in listed_prereqs[1] and not self.forward_fill(prereq, all_open_locs, True,
+                                                                                 self.logic_mode == "Chaos"):
                     prereq_list[1].append(prereq)
-                elif prereq not in prereq_list[2]:
+                    listed_prereqs[1].add(prereq_key)
+                elif prereq_key not in listed_prereqs[2]:
                     dest = self.logic[edge][2]
-                    traverse_result = self.traverse([dest], True)
-                    new_nodes = traverse_result[0]
-                    start_items_temp = self.items_collected[:] + prereq + traverse_result[1]
-                    item_destinations_temp = self.item_destinations[:]
-                    for x in new_nodes:
-                        item_destinations_temp += self.graph[x][6]
-                    inv_temp = self.get_inventory(start_items_temp, item_destinations_temp)
-                    if ignore_inv or len(inv_temp) <= MAX_INVENTORY:
+                    inventory_key = (prereq_multiset, dest)
+                    if inventory_key not in inventory_sizes:
+                        if dest not in traversals:
+                            traverse_result = self.traverse([dest], True)
+                            items_removed = []
+                            for x in traverse_result[0]:
+                                items_removed += self.graph[x].items_to_remove
+                            traversals[dest] = [traverse_result[1], items_removed]
+                        new_items, items_removed = traversals[dest]
+                        inventory_sizes[inventory_key] = self.get_inventory_size(prereq + new_items, items_removed)
+                    if ignore_inv or inventory_sizes[inventory_key] <= MAX_INVENTORY:
                         if True:  # not self.entrance_shuffle or self.check_ds_access(dest,0x10,True,[]):
                             prereq_list[0].append(prereq)
+                            listed_prereqs[0].add(prereq_key)
                         else:
                             ds_list.append(prereq)
                     else:
                         prereq_list[2].append(prereq)
+                        listed_prereqs[2].add(prereq_key)
 
         if prereq_list == [[], [], []]:
             prereq_list[0] += ds_list
@@ -546,7 +718,7 @@ class World:
         if not progression_result[1] and progression_result[2]:
             return self.remove_nonprog(1, True)
         for node in self.visited:
-            for x in self.graph[node][11]:
+            for x in self.graph[node].locations:
                 if self.is_filled(x) and self.item_locations[x][7] == 1 and self.item_pool[self.item_locations[x][3]][
                     5] > 1 and self.item_pool[self.item_locations[x][3]][6] == 1:
                     if self.unfill_item(x):
@@ -590,7 +762,7 @@ class World:
                 location = locations.pop(0)
                 items_removed.append(self.unfill_item(location))
                 count -= 1
-        self.verbose("   Removed nonprog items: " + str(items_removed))
+        self.verbose("   Removed nonprog items: %s", items_removed)
         return items_removed
 
     # Converts a progression list into a normalized Monte Carlo distribution
@@ -727,7 +899,7 @@ class World:
             if self.exits[sister_exit][0] == exit:
                 return sister_exit
             else:
-                self.warn("Exits linked incorrectly " + str(exit) + " " + str(sister_exit))
+                self.warn("Exits linked incorrectly %s %s", exit, sister_exit)
                 return sister_exit
         return 0
 
@@ -739,14 +911,14 @@ class World:
             return False
         origin = self.exits[exit][3]
         dest = self.exits[exit][4]
-        if self.graph[origin][2] == 2:
+        if self.graph[origin].type == 2:
             o_type = 2
         else:
             o_type = 1
-        if self.graph[origin][3] == 3:
+        if self.graph[origin].info == 3:
             d_type = 1
         else:
-            if self.graph[dest][2] == 2:
+            if self.graph[dest].type == 2:
                 d_type = 2
             else:
                 d_type = 1
@@ -757,7 +929,21 @@ class World:
 
     # Link one exit to another, making origin_exit act like dest_exit; that is,
     # replace the transition data of origin_exit with the vanilla transition data of dest_exit.
+    # The link and its return link (if check_connections) are staged in the exit table first; if either
+    # fails validation, the staged links are rolled back and nothing in the graph has changed.
     def link_exits(self, origin_exit, dest_exit, check_connections=True, update_graph=True):
+        undo_log = []
+        if not self.stage_exit_link(origin_exit, dest_exit, check_connections, undo_log):
+            self.rollback_exit_links(undo_log)
+            return False
+        if update_graph:
+            for staged_origin, staged_dest, _, _ in undo_log:
+                self.connect_exit(staged_origin, staged_dest)
+        return True
+
+    # Validate and link exits in the exit table only, recording each link in undo_log as
+    # [origin_exit, dest_exit, origin's previous link, dest's previous link] so it can be rolled back
+    def stage_exit_link(self, origin_exit, dest_exit, check_connections, undo_log):
         if origin_exit not in self.exits:
             self.error("Invalid origin (link) " + str(origin_exit))
             return False
@@ -770,35 +956,51 @@ class World:
         if self.exits[dest_exit][2] > 0 and dest_exit > 21:
             self.error("Destination already linked: " + str(dest_exit) + " " + str(self.exits[dest_exit]))
             return False
+        undo_log.append([origin_exit, dest_exit, self.exits[origin_exit][1], self.exits[dest_exit][2]])
         self.exits[origin_exit][1] = dest_exit
         self.exits[dest_exit][2] = origin_exit
         self.exit_log.append([origin_exit, dest_exit])
-        self.verbose("   Linked " + str(origin_exit) + " " + str(self.exits[origin_exit][10]) + " - " + str(
-            dest_exit) + " " + str(self.exits[dest_exit][10]))
-        if update_graph and self.exits[origin_exit][5]:
-            origin = self.exits[origin_exit][3]
-            dest = self.exits[dest_exit][4]
-            if dest not in self.graph[origin][1]:
-                self.graph[origin][1].append(dest)
-            self.new_connection(origin, dest, 0)
-            if self.is_accessible(origin) and not self.is_accessible(dest):
-                self.traverse([dest], test=False)
+        self.verbose("   Linked %s %s - %s %s", origin_exit, self.exits[origin_exit][10], dest_exit,
+                     self.exits[dest_exit][10])
         if (origin_exit <= 21 or self.coupled_exits) and check_connections and self.is_exit_coupled(
                 origin_exit) and self.is_exit_coupled(dest_exit):
             new_origin = self.exits[dest_exit][0]
             new_dest = self.exits[origin_exit][0]
             if new_origin <= 21:  # Boss exits
                 if self.exits[new_origin][5]:
-                    self.link_exits(new_origin, new_dest, False, update_graph)
+                    return self.stage_exit_link(new_origin, new_dest, False, undo_log)
             else:
                 if self.exits[new_origin][1] != -1 or self.exits[new_dest][2] != -1:
                     self.error("Return exit already linked: " + str(new_origin) + " " + str(new_dest))
                     return False
                 else:
-                    self.link_exits(new_origin, new_dest, False, update_graph)
+                    return self.stage_exit_link(new_origin, new_dest, False, undo_log)
         return True
 
-    # Unlinks two previously linked exits
+    # Undo staged exit links, most recent first
+    def rollback_exit_links(self, undo_log):
+        while undo_log:
+            origin_exit, dest_exit, origin_link, dest_link = undo_log.pop()
+            self.exits[origin_exit][1] = origin_link
+            self.exits[dest_exit][2] = dest_link
+            self.exit_log.pop()
+            self.verbose("   Rolled back link %s - %s", origin_exit, dest_exit)
+
+    # Add a linked exit's connection to the graph, traversing onward if it opens up new nodes
+    def connect_exit(self, origin_exit, dest_exit):
+        if self.exits[origin_exit][5]:
+            origin = self.exits[origin_exit][3]
+            dest = self.exits[dest_exit][4]
+            if dest not in self.graph[origin].links:
+                self.graph[origin].links.append(dest)
+                self.graph_version += 1
+            self.new_connection(origin, dest, 0)
+            if self.is_accessible(origin) and not self.is_accessible(dest):
+                self.traverse([dest], test=False)
+
+    # Unlinks two previously linked exits, in the exit table and (if update_graph) the exit's graph link.
+    # Like link_exits, it doesn't refresh the rest of the graph: access lost through the removed link is
+    # only recomputed by the caller's next update_graph, once per batch of exit changes.
     def unlink_exits(self, origin_exit, dest_exit, check_connections=True, update_graph=True):
         if origin_exit not in self.exits:
             self.error("Invalid origin (unlink) " + str(origin_exit))
@@ -816,29 +1018,33 @@ class World:
         for x in self.exit_log:
             if x[0] == origin_exit:
                 self.exit_log.remove(x)
-        self.verbose("   Unlinked " + str(origin_exit) + " " + str(self.exits[origin_exit][10]) + " - " + str(
-            dest_exit) + " " + str(self.exits[dest_exit][10]))
+        self.verbose("   Unlinked %s %s - %s %s", origin_exit, self.exits[origin_exit][10], dest_exit,
+                     self.exits[dest_exit][10])
         if update_graph and self.exits[origin_exit][5]:
             origin = self.exits[origin_exit][3]
             dest = self.exits[dest_exit][4]
-            if dest in self.graph[origin][1]:
-                self.graph[origin][1].remove(dest)
-            if dest in self.graph[origin][10]:
-                self.graph[origin][10].remove(dest)
+            if dest in self.graph[origin].links:
+                self.graph[origin].links.remove(dest)
+                self.graph_version += 1
+            if dest in self.graph[origin].to_nodes:
+                self.graph[origin].to_nodes.remove(dest)
+                self.graph_version += 1
         if self.coupled_exits and check_connections and self.is_exit_coupled(origin_exit) and self.is_exit_coupled(
                 dest_exit):
             new_origin = self.exits[dest_exit][0]
             new_dest = self.exits[origin_exit][0]
             self.unlink_exits(new_origin, new_dest, False, update_graph)
-        if check_connections and update_graph:
-            self.update_graph(True, True, True)
         return True
 
     # Bidirectional exit link. Make exit1 send the player to where exit2 is, and vice versa.
+    # Either both directions are linked or, if one fails, neither is.
     def join_exits(self, exit1, exit2):
-        return (self.link_exits(exit1, self.exits[exit2][0], False, False) and self.link_exits(exit2,
-                                                                                               self.exits[exit1][0],
-                                                                                               False, False))
+        undo_log = []
+        if self.stage_exit_link(exit1, self.exits[exit2][0], False, undo_log) and self.stage_exit_link(
+                exit2, self.exits[exit1][0], False, undo_log):
+            return True
+        self.rollback_exit_links(undo_log)
+        return False
 
     # Unlink both sides of a bidirectional exit.
     def unjoin_exit(self, exit):
@@ -871,18 +1077,18 @@ class World:
 
     def print_exit_log(self, exit_log=[]):
         for origin, dest in exit_log:
-            self.verbose(str(self.exits[origin][10]) + " - " + str(self.exits[dest][10]))
+            self.verbose("%s - %s", self.exits[origin][10], self.exits[dest][10])
 
     # Returns lists of origin exits and destination exits that open up new nodes
     def get_open_exits(self, check_progression=False):
         open_exits = [[], []]
         for node in self.graph:
             if not check_progression or self.is_accessible(node):
-                for exit in self.graph[node][14]:
+                for exit in self.graph[node].origin_exits:
                     if self.exits[exit][1] == -1:
                         open_exits[0].append(exit)
             if not check_progression or not self.is_accessible(node):
-                for exit in self.graph[node][15]:
+                for exit in self.graph[node].dest_exits:
                     if self.exits[exit][2] == -1:
                         open_exits[1].append(exit)
         return open_exits
@@ -896,7 +1102,7 @@ class World:
             self.verbose("  No more accessible exits available")
             return False
         elif not dest_exits_ls:
-            self.verbose("  No destination exits available from " + str(origin_exits_ls))
+            self.verbose("  No destination exits available from %s", origin_exits_ls)
             return False
 
         origin_exits = origin_exits_ls[:]
@@ -921,7 +1127,6 @@ class World:
             dest_exit = 0
             quarantine_d = []
             while not done and dest_exits:
-                try_link = False
                 while not dest_exit and dest_exits:
                     dest_exit = dest_exits.pop(0)
                     dest = self.exits[dest_exit][4]
@@ -930,12 +1135,12 @@ class World:
                         dest_exit = 0
 
                 if not dest_exit:
-                    self.verbose("  No destination exits available from " + str(origin_exit))
+                    self.verbose("  No destination exits available from %s", origin_exit)
                     return False
 
                 direction_new = self.exit_direction(dest_exit)
                 if dest_exit != sister_exit and (not check_direction or direction_new == direction):
-                    try_link = True
+                    # A rejected link is rolled back by link_exits, so the graph needs no rebuild here
                     if self.link_exits(origin_exit, dest_exit, self.coupled_exits, True):
                         if True:  # or not check_ds_access or self.check_ds_access(dest):
                             done = True
@@ -944,8 +1149,6 @@ class World:
 
                 if not done:
                     quarantine_d.append(dest_exit)
-                    if try_link:
-                        self.unlink_exits(origin_exit, dest_exit, True, True)
                     dest_exit = 0
 
             if not done:
@@ -954,7 +1157,7 @@ class World:
                 quarantine_d.clear()
 
         if not done:
-            self.verbose("No suitable links could be found - in quarantine: " + str(quarantine_o))
+            self.verbose("No suitable links could be found - in quarantine: %s", quarantine_o)
             return False
 
         # Clean up O/D lists
@@ -972,54 +1175,81 @@ class World:
     def check_access(self, origin=-1, dest=-1, check_mutual=False, formless=False):
         if origin not in self.graph or dest not in self.graph:
             return False
-        if self.graph[origin][7] or self.graph[dest][7]:
+        if self.graph[origin].force_will or self.graph[dest].force_will:
             return False
         success = False
-        if origin == dest or (dest in self.graph[origin][10] and not formless):
+        if origin == dest or (dest in self.graph[origin].to_nodes and not formless):
             success = True
         elif formless:
             to_visit = [origin]
-            visited = []
+            seen = {origin}  # Nodes visited or queued
             while not success and to_visit:
                 node = to_visit.pop()
-                visited.append(node)
-                if self.graph[node][7]:  # Will-Only nodes don't propagate formless access
+                if self.graph[node].force_will:  # Will-Only nodes don't propagate formless access
                     continue
                 elif node == dest:
                     success = True
                     break
                 else:
-                    to_visit.extend([n for n in self.graph[node][1] if n not in visited + to_visit])
-                    for edge in self.graph[node][12]:
+                    for n in self.graph[node].links:
+                        if n not in seen:
+                            seen.add(n)
+                            to_visit.append(n)
+                    for edge in self.graph[node].origin_edges:
                         if (self.logic[edge][0] > 0) and self.edge_formless(edge) and (
-                                self.logic[edge][2] not in visited + to_visit):
+                                self.logic[edge][2] not in seen):
+                            seen.add(self.logic[edge][2])
                             to_visit.append(self.logic[edge][2])
         else:
-            to_visit = self.graph[origin][10][:]
-            visited = [origin]
+            to_visit = deque(self.graph[origin].to_nodes)
+            seen = set(to_visit)  # Nodes visited or queued
+            seen.add(origin)
             while not success and to_visit:
-                node = to_visit.pop(0)
-                visited.append(node)
-                if not self.graph[node][7] and dest in self.graph[node][10]:
+                node = to_visit.popleft()
+                if not self.graph[node].force_will and dest in self.graph[node].to_nodes:
                     success = True
                 else:
-                    for x in self.graph[node][10]:
-                        if x not in to_visit + visited:
+                    for x in self.graph[node].to_nodes:
+                        if x not in seen:
+                            seen.add(x)
                             to_visit.append(x)
         if not check_mutual or not success:
             return success
         return self.check_access(dest, origin, False, formless)
 
+    # Returns the mutual-access classes of the graph's to_nodes connections, as a dict of node: class ID.
+    # Two distinct nodes are mutually accessible by check_access exactly when they share a class: that is,
+    # they're in the same strongly connected component, and each can be entered from a non-Will-only node
+    # in it (check_access never completes a path out of a ForceWillForm node). Nodes that can't be mutually
+    # accessible with any other node are left out. The condensation is cached against graph_version,
+    # so islands rebuilt between exit shuffle passes over an unchanged graph reuse it.
+    def get_access_classes(self):
+        if self.access_class_cache and self.access_class_cache[0] == self.graph_version:
+            return self.access_class_cache[1]
+        component = strongly_connected_components({node: self.graph[node].to_nodes for node in self.graph})
+        access_class = {}
+        for node, graph_node in self.graph.items():
+            if graph_node.force_will:
+                continue
+            for y in graph_node.to_nodes:
+                if y in component and component[y] == component[node] and not self.graph[y].force_will:
+                    access_class[y] = component[y]
+        self.access_class_cache = [self.graph_version, access_class]
+        return access_class
+
     # Build islands, i.e. groups of nodes accessible from each other, generally assuming all progression.
     # With require_mutual, island nodes are mutually accessible, with no one-way drops or similar.
     # Examples: Freejia-Exterior; north half of Sky Garden SW Top.
     def build_islands(self, require_mutual=True):
+        if require_mutual:
+            access_class = self.get_access_classes()
         islands = [[] for _ in range(13)]
-        visited = []
+        seen = set()  # Nodes already assigned to an island, or queued for the current one
         start_island = []
         for node in self.graph:
-            if node not in visited and self.graph[node][2]:
-                to_visit = [node]
+            if node not in seen and self.graph[node].type:
+                to_visit = deque([node])
+                seen.add(node)
                 new_nodes = []
                 origin_exits = []
                 dest_exits = []
@@ -1028,30 +1258,38 @@ class World:
                 is_start = False
                 dungeon = 9999
                 while to_visit:
-                    x = to_visit.pop(0)
-                    visited.append(x)
+                    x = to_visit.popleft()
+                    graph_node = self.graph[x]
                     new_nodes.append(x)
-                    if 0 in self.graph[x][8]:
+                    if 0 in graph_node.from_nodes:
                         is_start = True
-                    for exit in self.graph[x][14]:
+                    for exit in graph_node.origin_exits:
                         if self.exits[exit][1] == -1:
                             origin_exits.append(exit)
                             dungeon = min(dungeon, self.exit_dungeon(exit))
-                    for exit in self.graph[x][15]:
+                    for exit in graph_node.dest_exits:
                         if self.exits[exit][2] == -1:
                             dest_exits.append(exit)
-                    for edge in self.graph[x][12]:
+                    for edge in graph_node.origin_edges:
                         if self.logic[edge][0] == 0:
                             origin_logic.append(edge)
-                    for edge in self.graph[x][13]:
+                    for edge in graph_node.dest_edges:
                         if self.logic[edge][0] == 0:
                             dest_logic.append(edge)
-                    for y in self.graph[x][10]:
-                        if y not in visited + to_visit and self.check_access(x, y, require_mutual):
+                    for y in graph_node.to_nodes:
+                        if y in seen:
+                            continue
+                        if require_mutual:
+                            accessible = x in access_class and access_class.get(y) == access_class[x]
+                        else:
+                            accessible = self.check_access(x, y, False)
+                        if accessible:
+                            seen.add(y)
                             to_visit.append(y)
                     if not require_mutual:
-                        for y in self.graph[x][8]:
-                            if y not in visited + to_visit and self.check_access(y, x, False):
+                        for y in graph_node.from_nodes:
+                            if y not in seen and self.check_access(y, x, False):
+                                seen.add(y)
                                 to_visit.append(y)
                 island = [new_nodes, origin_exits, dest_exits, origin_logic, dest_logic]
                 if is_start:
@@ -1097,13 +1335,13 @@ class World:
     def shuffle_chaos_dungeon(self):
         # Build dungeon node islands for the skeleton, assuming free and all-form movement
         self.reset_progress(True)
-        self.items_collected = [800,802,803]+self.list_typed_items(types=[1, 2, 4, 5], shuffled_only=False, incl_placed=True)
+        self.set_items_collected([800,802,803]+self.list_typed_items(types=[1, 2, 4, 5], shuffled_only=False, incl_placed=True))
         for removed_orb in [707,708,709,735]:   # Due to awkward orb placement, treat Inca exterior and Wat Outer South as corridors
             if removed_orb in self.items_collected:
                 self.items_collected.remove(removed_orb)
         for node in self.graph:
-            self.graph[node][0] = True
-            self.graph[node][4] = 0x37
+            self.graph[node].visited = True
+            self.graph[node].form_access = 0x37
         self.update_graph(True, False, True)
         island_result = self.build_islands()
         islands = island_result[1].pop(1)  # pop(1) = list of all islands assigned to the chaos dungeon
@@ -1132,9 +1370,9 @@ class World:
                 is_free_ds_corridor = False
                 ds_node = next((n for n in subisland[0] if n in self.ds_nodes), 0)
                 if ds_node > 0:  # Island contains a DS node
-                    ds_loc = next(loc for loc in self.graph[ds_node][11] if self.item_locations[loc][1] == 2)
+                    ds_loc = next(loc for loc in self.graph[ds_node].locations if self.item_locations[loc][1] == 2)
                     if self.spawn_locations[ds_loc][3]:  # Island DS allows transform
-                        if all(self.edge_formless(e) for n in subisland[0] for e in self.graph[n][12]):   # Island is internally-formless
+                        if all(self.edge_formless(e) for n in subisland[0] for e in self.graph[n].origin_edges):   # Island is internally-formless
                             is_free_ds_corridor = True
                 if is_free_ds_corridor:
                     free_ds_corridor_islands.append(subisland)
@@ -1151,8 +1389,8 @@ class World:
         all_islands = deadend_islands + corridor_islands + branch_islands
         for lower_i in deadend_islands:
             lower_n = lower_i[0][0]
-            lower_map = self.graph[lower_n][3][3]  # One-way access must be within the same map
-            upper_i = next((i for i in all_islands if i != lower_i and any((lower_map == self.graph[upper_n][3][3]) and self.check_access(upper_n,lower_n,False) for upper_n in i[0])), [])
+            lower_map = self.graph[lower_n].info[3]  # One-way access must be within the same map
+            upper_i = next((i for i in all_islands if i != lower_i and any((lower_map == self.graph[upper_n].info[3]) and self.check_access(upper_n,lower_n,False) for upper_n in i[0])), [])
             if upper_i:  # Merge the lower island into the upper one, and record the lower exit
                 upper_i[0].extend(lower_i[0][:])
                 upper_i[1].extend(lower_i[1][:])
@@ -1178,15 +1416,15 @@ class World:
         oneway_corridor_islands = [i for i in corridor_islands if any(x in blocked_exits for x in i[1])]
         random.shuffle(corridor_islands)
         elig_foyer_corridors = [i for i in corridor_islands if i not in oneway_corridor_islands and not any(
-            self.graph[n][3][3] in [0x1d, 0xb1] for n in i[0])]
+            self.graph[n].info[3] in [0x1d, 0xb1] for n in i[0])]
         # Pyramid is done first and given non-DS corridors; thus Mu and SkGn have increased DS corridor odds
-        for base_island in sorted(foyer_islands, key=lambda i: max(self.graph[n][3][3] for n in i[0]), reverse=True):
-            is_pymd_island = any(self.graph[n][3][3] == 204 for n in base_island[0])
+        for base_island in sorted(foyer_islands, key=lambda i: max(self.graph[n].info[3] for n in i[0]), reverse=True):
+            is_pymd_island = any(self.graph[n].info[3] == 204 for n in base_island[0])
             foyer_exits = base_island[1][:]
             for base_exit in foyer_exits:
                 if is_pymd_island:
                     new_corridor = next(i for i in elig_foyer_corridors if not any(
-                        self.item_locations[loc][1] == 2 for n in i[0] for loc in self.graph[n][11]))
+                        self.item_locations[loc][1] == 2 for n in i[0] for loc in self.graph[n].locations))
                 else:
                     new_corridor = next(i for i in elig_foyer_corridors)
                 elig_foyer_corridors.remove(new_corridor)
@@ -1272,7 +1510,7 @@ class World:
                 num_deadends -= 1
             self.item_pool[0][0] -= 1
             self.item_locations[132][2] = True
-            self.item_locations[132][3] = 0
+            self.set_location_item(132, 0)
             self.item_locations[132][7] = 0
             self.optional_nodes.append(442)
             self.link_exits(641, self.exits[641][0], False, False)
@@ -1323,7 +1561,7 @@ class World:
             skeleton.append(new_island)
         # Assuming all DSes are for transform, find and fix missing formful access if possible.
         # Need to reset and re-traverse in every iteration, because we're moving exits around.
-        graph_free_access = {n: self.graph[n][1][:] for n in self.graph}
+        graph_free_access = {n: self.graph[n].links.copy() for n in self.graph}
         node_to_fix = 0
         nodes_fixed = [node_to_fix]
         f_missing_nodes = {-1}
@@ -1331,20 +1569,20 @@ class World:
             random.shuffle(dungeon_exit_keys)
             self.reset_progress(True)
             for n in self.graph:
-                self.graph[n][1] = graph_free_access[n][:]
-            self.items_collected = [800,802,803]+self.list_typed_items(types=[1, 2, 4, 5], shuffled_only=False, incl_placed=True)
+                self.graph[n].links = graph_free_access[n].copy()
+            self.graph_version += 1
+            self.set_items_collected([800,802,803]+self.list_typed_items(types=[1, 2, 4, 5], shuffled_only=False, incl_placed=True))
             for loc in self.spawn_locations:
                 if self.spawn_locations[loc][3] and loc in self.item_locations and self.item_locations[loc][1] == 2:
                     self.item_locations[loc][2] = True
             self.update_graph(True, True, True)
             for s in foyer_nodesets:
                 for n in s:
-                    self.graph[n][4] = 0x11  # Will can access all foyers
+                    self.graph[n].form_access = 0x11  # Will can access all foyers
             trav_nodes = self.traverse(to_visit=[n for s in foyer_nodesets for n in s])
             f_missing_nodes = {self.logic[e][1] for e in self.open_edges if
                                not self.edge_formless(e) and any(self.logic[e][1] in i[0] for i in skeleton) and not (
-                                       self.logic[e][3] & self.graph[self.logic[e][1]][
-                                   4]) and not self.is_accessible(self.logic[e][2])}
+                                       self.logic[e][3] & self.graph[self.logic[e][1]].form_access) and not self.is_accessible(self.logic[e][2])}
             if not f_missing_nodes:
                 break  # Success
             elif any(node in f_missing_nodes for node in nodes_fixed):
@@ -1354,7 +1592,7 @@ class World:
             island_to_fix = next(i for i in skeleton if node_to_fix in i[0])
             new_island = free_ds_corridor_islands.pop()
             base_exit = next((x for x in dungeon_exit_keys if
-                              self.graph[self.exits[x][3]][0] and not self.graph[self.exits[x][3]][9] and x not in
+                              self.graph[self.exits[x][3]].visited and not self.graph[self.exits[x][3]].ds_nodes and x not in
                               island_to_fix[2] and self.check_access(self.exits[x][3], node_to_fix, False, True)),
                              island_to_fix[2][0])
             new_exit1 = new_island[1].pop()
@@ -1378,7 +1616,8 @@ class World:
         # Clean up the graph
         self.reset_progress(True)
         for n in self.graph:
-            self.graph[n][1] = graph_free_access[n][:]
+            self.graph[n].links = graph_free_access[n].copy()
+        self.graph_version += 1
         for loc in self.spawn_locations:
             if self.spawn_locations[loc][3] and loc in self.item_locations and self.item_locations[loc][1] == 2 and self.item_locations[loc][3] == 0:
                 self.item_locations[loc][2] = False
@@ -1391,8 +1630,8 @@ class World:
             if self.exits[x][1] < 0:
                 if not self.is_exit_coupled(x):
                     one_way_exits.append(x)
-                self.graph[self.exits[x][3]][14].append(x)
-                self.graph[self.exits[x][4]][15].append(x)
+                self.graph[self.exits[x][3]].origin_exits.append(x)
+                self.graph[self.exits[x][4]].dest_exits.append(x)
 
         # Don't randomize Jeweler's final exit in RJH seeds
         if self.goal == "Red Jewel Hunt":
@@ -1450,7 +1689,7 @@ class World:
         # Assume all items and abilities
         self.info("Beginning exit shuffle...")
         self.reset_progress(True)
-        self.items_collected = self.list_typed_items(types=[1, 2, 4, 5], shuffled_only=True, incl_placed=True)
+        self.set_items_collected(self.list_typed_items(types=[1, 2, 4, 5], shuffled_only=True, incl_placed=True))
         self.update_graph(True, True, True)
 
         # Build world skeleton with islands
@@ -1462,14 +1701,14 @@ class World:
         visited = traverse_result[0]
         origin_exits = []
         for node in visited:
-            origin_exits += self.graph[node][14]
+            origin_exits += self.graph[node].origin_exits
 
         i = 0
         for x in islands:
             i += 1
-            self.verbose("Initial island " + str(i) + " (" + str(x[1]) + "," + str(x[2]) + "):")
+            self.verbose("Initial island %s (%s,%s):", i, x[1], x[2])
             for y in x[0]:
-                self.verbose(" - " + self.graph[y][5])
+                self.verbose(" - %s", self.graph[y].name)
         self.info(" Joining initial islands...")
 
         check_direction = True
@@ -1498,7 +1737,7 @@ class World:
                     else:
                         self.verbose("New island:")
                         for y in nodes_new:
-                            self.verbose(" - " + str(self.graph[y][5]))
+                            self.verbose(" - %s", self.graph[y].name)
                         traverse_result = self.traverse(island[0])
                         visited += traverse_result[0]
                         progression_result = self.get_open_exits()
@@ -1525,14 +1764,14 @@ class World:
 
         # Check Dark Space access, map exits accordingly
         self.reset_progress()
-        self.items_collected = self.list_typed_items(types=[1, 2, 4, 5], shuffled_only=True, incl_placed=True)
+        self.set_items_collected(self.list_typed_items(types=[1, 2, 4, 5], shuffled_only=True, incl_placed=True))
         self.update_graph(True, True, True)
 
         island_result = self.build_islands()
         islands = island_result[1].pop(0)
 
         islands_no_ds = []
-        ds_check_visited = []
+        ds_check_visited = set()
         for island in islands:
             if self.is_accessible(island[0][0]) and not self.check_ds_access(island[0][0], False, True,
                                                                              ds_check_visited):
@@ -1543,14 +1782,14 @@ class World:
             i = 0
             for x in islands_no_ds:
                 i += 1
-                self.verbose("Island " + str(x))
+                self.verbose("Island %s", x)
                 for y in x[0]:
-                    self.verbose("- " + str(self.graph[y][5]))
+                    self.verbose("- %s", self.graph[y].name)
 
             dest_exits_ds = []
             for node in self.graph:
                 if node not in visited and self.check_ds_access(node, False, True, ds_check_visited):
-                    for exit in self.graph[node][15]:
+                    for exit in self.graph[node].dest_exits:
                         if self.exits[exit][2] == -1:
                             dest_exits_ds.append(exit)
 
@@ -1567,7 +1806,7 @@ class World:
 
         # Link exits forward
         self.reset_progress()
-        self.items_collected = self.list_typed_items(types=[1, 2, 4, 5], shuffled_only=True, incl_placed=True)
+        self.set_items_collected(self.list_typed_items(types=[1, 2, 4, 5], shuffled_only=True, incl_placed=True))
         self.update_graph(True, True, True)
         self.traverse()
 
@@ -1593,8 +1832,7 @@ class World:
                     check_direction = True
                     self.info("  Finished mapping progression exits")
                 else:
-                    self.info("Can't link any origin exit of " + str(origin_exits) + " to any dest exit of " + str(
-                        dest_exits))
+                    self.info("Can't link any origin exit of %s to any dest exit of %s", origin_exits, dest_exits)
                     return False
 
         # Randomly link any leftover exits
@@ -1602,10 +1840,10 @@ class World:
         dest_exits = []
         for exit in self.exits:
             if self.exits[exit][1] == -1:
-                self.verbose(" Unmapped exit: " + str(exit) + " " + str(self.exits[exit]))
+                self.verbose(" Unmapped exit: %s %s", exit, self.exits[exit])
                 origin_exits.append(exit)
             if self.exits[exit][2] == -1:
-                self.verbose(" No exit mapped to: " + str(exit) + " " + str(self.exits[exit]))
+                self.verbose(" No exit mapped to: %s %s", exit, self.exits[exit])
                 dest_exits.append(exit)
             if origin_exits:
                 random.shuffle(origin_exits)
@@ -1647,8 +1885,8 @@ class World:
     def initialize_ds(self):
         # Clear DS access data from graph
         for x in self.graph:
-            self.graph[x][4] = 0
-            self.graph[x][9].clear()
+            self.graph[x].form_access = 0
+            self.graph[x].ds_nodes.clear()
         # Find nodes that contain Dark Spaces, and of those, which allow transform and don't contain an ability
         self.ds_locations = [loc for loc in self.spawn_locations if loc in self.item_locations]
         self.ds_nodes = [self.item_locations[loc][0] for loc in self.ds_locations]
@@ -1685,57 +1923,57 @@ class World:
                                 dest = self.exits[sister_exit][3]
                                 self.exits[new_exit][4] = dest
                             # Translate link into world graph
-                            if origin and dest and (dest not in self.graph[origin][1]):
-                                self.graph[origin][1].append(dest)
+                            if origin and dest and (dest not in self.graph[origin].links):
+                                self.graph[origin].links.append(dest)
+                                self.graph_version += 1
             self.verbose(" Graph exits updated")
 
-        # Update logic edges that aren't form-specific
+        # Update logic edges that aren't form-specific. Only unopened edges with their
+        # item requirements met can open here, in this pass or the form-specific one.
         if update_logic:
-            for edge in self.logic:
+            openable_edges = [e for e in self.logic if self.logic[e][0] == 0 and not self.unmet_reqs[e]]
+            for edge in openable_edges:
                 if self.edge_formless(edge):
-                    self.check_edge(edge, [], True, self.graph[self.logic[edge][1]][4])
+                    self.check_edge(edge, [], True, self.graph[self.logic[edge][1]].form_access)
             self.verbose(" Graph formless logic updated")
 
-        for node in self.graph:
-            for x in self.graph[node][1]:
-                if x not in self.graph[node][10]:
-                    self.graph[node][10].append(x)
-            for y in self.graph[node][10]:
-                if node not in self.graph[y][8]:
-                    self.graph[y][8].append(node)
-            for z in self.graph[node][8]:
-                if node not in self.graph[z][10]:
-                    self.graph[z][10].append(node)
+        for node, graph_node in self.graph.items():
+            graph_node.to_nodes.extend(graph_node.links)
+            for y in graph_node.to_nodes:
+                self.graph[y].from_nodes.add(node)
+            for z in graph_node.from_nodes:
+                self.graph[z].to_nodes.add(node)
+        self.graph_version += 1
         self.verbose(" Graph node-node connections updated")
 
         if update_ds:
             # Clear and recalculate DS access for all nodes (recursively from DS nodes)
             self.initialize_ds()
             for node in self.ds_nodes:
-                for loc in self.graph[node][11]:
+                for loc in self.graph[node].locations:
                     if loc in self.spawn_locations and self.spawn_locations[loc][3]:
                         self.update_ds_access([node],0x20,[node])   # Propagate "reachable formlessly from a possibly-txform DS"
-                if self.graph[node][0]:   # Only actually-visited nodes count for these flags
+                if self.graph[node].visited:   # Only actually-visited nodes count for these flags
                     self.update_ds_access([node],0x10,[])   # Propagate "can traverse to a DS"
                     if node in self.txform_nodes:
                         self.update_ds_access([node],(0x01|0x02|0x04),[])   # Propagate form traversal
             self.update_ds_access([0],0x01,[])   # Will has access to the start node
             for node in [10,11,12,13,14]:   # Will has access to traversed overworld-connected nodes
-                if self.graph[node][0]:
+                if self.graph[node].visited:
                     self.update_ds_access([node], 0x01, [])
             self.verbose(" Graph DS access updated")
 
         # Update form-specific logic, repeatedly until access stops growing
         if update_logic:
-            all_f_edges = [e for e in self.logic if not self.edge_formless(e)]
-            checked_f_edges = []
+            all_f_edges = [e for e in openable_edges if not self.edge_formless(e)]
+            checked_f_edges = set()
             checked_new_edge = True
             while checked_new_edge:
                 checked_new_edge = False
                 for edge in all_f_edges:
                     if edge not in checked_f_edges and self.check_edge(edge, [], True,
-                                                                       self.graph[self.logic[edge][1]][4]):
-                        checked_f_edges.append(edge)
+                                                                       self.graph[self.logic[edge][1]].form_access):
+                        checked_f_edges.add(edge)
                         checked_new_edge = True
             self.verbose(" Graph formful logic updated")
 
@@ -1753,83 +1991,112 @@ class World:
                 if access_mode & flag:
                     result |= self.consider_ds_node(node, flag, ds_nodes)
             return result
-        if access_mode in [0x02, 0x04, 0x20] and self.graph[node][7]:
+        if access_mode in [0x02, 0x04, 0x20] and self.graph[node].force_will:
             return False  # Always-Will nodes never allow not-Will or formless traversal
-        if access_mode == 0x20 and any(ds_node not in self.graph[node][9] for ds_node in ds_nodes):
+        if access_mode == 0x20 and any(ds_node not in self.graph[node].ds_nodes for ds_node in ds_nodes):
             return True
-        if not (self.graph[node][4] & access_mode):
+        if not (self.graph[node].form_access & access_mode):
             return True
         return False
 
+    # Returns the reverse of the graph's links, as a dict of node: list of the nodes linking to it, in graph
+    # order. Built once per graph change (see graph_version) rather than on every check_ds_access.
+    def get_linked_from(self):
+        if self.linked_from_cache and self.linked_from_cache[0] == self.graph_version:
+            return self.linked_from_cache[1]
+        linked_from = {}
+        for n, graph_node in self.graph.items():
+            for x in graph_node.links:
+                if x not in linked_from:
+                    linked_from[x] = []
+                linked_from[x].append(n)
+        self.linked_from_cache = [self.graph_version, linked_from]
+        return linked_from
+
     # Check if start_node can reach a DS or be reached by a form
     def check_ds_access(self, start_node, access_mode, do_recurse, visited):
         if access_mode not in [0x01, 0x02, 0x04, 0x10, 0x20]:  # If combined access is checked, "or" logic is used
             for flag in [0x01, 0x02, 0x04, 0x10, 0x20]:
-                sub_visited = visited[:]
+                sub_visited = visited.copy()
                 if (access_mode & flag) and self.check_ds_access(start_node, flag, do_recurse, sub_visited):
                     return True
             return False
         if start_node not in self.graph or start_node < 0:
             return False  # Not a real node, dude
-        if self.graph[start_node][7] and access_mode in [0x02, 0x04, 0x20]:
+        if self.graph[start_node].force_will and access_mode in [0x02, 0x04, 0x20]:
             return False  # ForceWillForm denies non-Will and formless access
-        if self.graph[start_node][4] & access_mode:
+        if self.graph[start_node].form_access & access_mode:
             return True  # Node has already been evaluated to have the right DS access
         if not do_recurse:
             return False  # Caller only wants to check this node's evaluated access
         if start_node in visited:
             return False  # We've already recursed through this node
-        to_visit = [start_node]
+        if access_mode in [0x01, 0x02, 0x04, 0x20]:
+            linked_from = self.get_linked_from()
+        # Every node taken off to_visit ends up in visited, so a node is new if it's in neither visited
+        # nor queued, the set of nodes ever put on to_visit
+        to_visit = deque([start_node])
+        queued = {start_node}
         while to_visit:
-            node = to_visit.pop(0)
-            if node not in visited + [start_node] and self.check_ds_access(node, access_mode, do_recurse, visited):
-                self.verbose("Node "+str(start_node)+" has form "+str(access_mode)+" access via node "+str(node))
+            node = to_visit.popleft()
+            if node != start_node and node not in visited and self.check_ds_access(node, access_mode, do_recurse,
+                                                                                    visited):
+                self.verbose("Node %s has form %s access via node %s", start_node, access_mode, node)
                 return True
             else:
-                if node not in visited:
-                    visited.append(node)
+                visited.add(node)
                 if access_mode in [0x01, 0x02, 0x04,
                                    0x20]:  # if checking "can be reached [by form]", find nodes that can reach here
-                    to_visit.extend([n for n in self.graph if node in self.graph[n][1] and n not in visited + to_visit])
-                    for edge in self.graph[node][13]:
-                        if (self.logic[edge][0] > 0) and (self.logic[edge][3] & access_mode) and (
-                                self.logic[edge][1] not in visited + to_visit):
-                            to_visit.append(self.logic[edge][1])
+                    next_nodes = linked_from.get(node, []) + [
+                        self.logic[edge][1] for edge in self.graph[node].dest_edges
+                        if (self.logic[edge][0] > 0) and (self.logic[edge][3] & access_mode)]
                 else:  # if checking "can reach any DS", follow edges forward
-                    to_visit.extend([n for n in self.graph[node][1] if n not in visited + to_visit])
-                    for edge in self.graph[node][12]:
-                        if (self.logic[edge][0] > 0) and ((self.logic[edge][3] & 0x07) == 0x07) and (
-                                self.logic[edge][2] not in visited + to_visit):
-                            to_visit.append(self.logic[edge][2])
+                    next_nodes = list(self.graph[node].links) + [
+                        self.logic[edge][2] for edge in self.graph[node].origin_edges
+                        if (self.logic[edge][0] > 0) and ((self.logic[edge][3] & 0x07) == 0x07)]
+                for n in next_nodes:
+                    if n not in visited and n not in queued:
+                        queued.add(n)
+                        to_visit.append(n)
         return False
 
-    # Update DS access data for nodes, recursively to all connected nodes
+    # Update DS access data for nodes, and propagate it to all connected nodes.
+    # Works through a stack of [nodes, access_mode, ds_nodes] batches in depth-first order,
+    # so nodes are updated in the same order as when this recursed, without the recursion.
     def update_ds_access(self, nodes, access_mode, ds_nodes):
-        if not nodes:
-            return True
-        visit_forward = [[], [], [], []]  # visit for w, f, s, formless
-        visit_reverse = []
-        for node in nodes:
-            self.graph[node][4] |= access_mode
-            if access_mode & 0x10:  # Can reach a DS here, so propagate "can reach DS" backward
-                visit_reverse = [x for x in self.graph[node][8] if self.consider_ds_node(x, 0x10, [])]
-            if access_mode & (0x01 | 0x02 | 0x04 | 0x20):  # Can be transformed here, so propagate the form forward
-                if access_mode & 0x20:
-                    self.graph[node][9].extend([ds_node for ds_node in ds_nodes if ds_node not in self.graph[node][9]])
-                for idx, flag in [(0, 0x01), (1, 0x02), (2, 0x04), (3, 0x20)]:
-                    if (access_mode & flag):
-                        visit_forward[idx].extend(
-                            [n for n in self.graph[node][1] if self.consider_ds_node(n, flag, ds_nodes)])
-                        for forward_edge in self.graph[node][12]:
-                            if self.check_edge(forward_edge,[],False,flag) and self.consider_ds_node(self.logic[forward_edge][2],flag,ds_nodes) and self.logic[forward_edge][2] not in visit_forward[idx]:
-                                visit_forward[idx].append(self.logic[forward_edge][2])
-        result = self.update_ds_access(visit_reverse, 0x10, [])
-        for idx, flag in [(0, 0x01), (1, 0x02), (2, 0x04)]:
-            if visit_forward[idx]:
-                result |= self.update_ds_access(set(visit_forward[idx]), flag, [])
-        if visit_forward[3]:
-            result |= self.update_ds_access(set(visit_forward[3]), 0x20, ds_nodes)
-        return result
+        stack = [[nodes, access_mode, ds_nodes]]
+        while stack:
+            nodes, access_mode, ds_nodes = stack.pop()
+            if not nodes:
+                continue
+            visit_forward = [[], [], [], []]  # visit for w, f, s, formless
+            forward_found = [set(), set(), set(), set()]
+            visit_reverse = []
+            for node in nodes:
+                self.graph[node].form_access |= access_mode
+                if access_mode & 0x10:  # Can reach a DS here, so propagate "can reach DS" backward
+                    visit_reverse = [x for x in self.graph[node].from_nodes if self.consider_ds_node(x, 0x10, [])]
+                if access_mode & (0x01 | 0x02 | 0x04 | 0x20):  # Can be transformed here, so propagate the form forward
+                    if access_mode & 0x20:
+                        self.graph[node].ds_nodes.extend([ds_node for ds_node in ds_nodes if ds_node not in self.graph[node].ds_nodes])
+                    for idx, flag in [(0, 0x01), (1, 0x02), (2, 0x04), (3, 0x20)]:
+                        if (access_mode & flag):
+                            found = [n for n in self.graph[node].links if self.consider_ds_node(n, flag, ds_nodes)]
+                            visit_forward[idx].extend(found)
+                            forward_found[idx].update(found)
+                            for forward_edge in self.graph[node].origin_edges:
+                                dest = self.logic[forward_edge][2]
+                                if dest not in forward_found[idx] and self.check_edge(forward_edge,[],False,flag) and self.consider_ds_node(dest,flag,ds_nodes):
+                                    visit_forward[idx].append(dest)
+                                    forward_found[idx].add(dest)
+            batches = [[visit_reverse, 0x10, []]]
+            for idx, flag in [(0, 0x01), (1, 0x02), (2, 0x04)]:
+                if visit_forward[idx]:
+                    batches.append([set(visit_forward[idx]), flag, []])
+            if visit_forward[3]:
+                batches.append([set(visit_forward[3]), 0x20, ds_nodes])
+            stack.extend(reversed(batches))  # Reversed, so the first batch is popped first
+        return True
 
 
     # Check whether edge requirements are met by self.items_collected + items.
@@ -1840,16 +2107,15 @@ class World:
             return False
         elif self.logic[edge][0] > 0:
             success = True
-        req_items = []
-        for req in self.logic[edge][4]:
-            i = 0
-            while i < req[1]:
-                req_items.append(req[0])
-                i += 1
-        if self.is_sublist(self.items_collected + items, req_items) and (
-                self.edge_formless(edge) or self.check_ds_access(self.logic[edge][1], self.logic[edge][3] & form, False,
-                                                                 [])):
-            success = True
+        else:
+            if items:
+                reqs_met = has_requirements(self.items_collected.counts + Counter(items), self.edge_requirements(edge))
+            else:
+                reqs_met = not self.unmet_reqs[edge]
+            if reqs_met and (
+                    self.edge_formless(edge) or self.check_ds_access(self.logic[edge][1], self.logic[edge][3] & form,
+                                                                     False, set())):
+                success = True
         if success and update_graph and self.logic[edge][0] == 0:
             self.logic[edge][0] = 1
             self.new_connection(self.logic[edge][1], self.logic[edge][2], self.logic[edge][3] & form)
@@ -1857,15 +2123,16 @@ class World:
 
     # Save a new connection (i.e. exit or edge) for forms to graph, and update DS access
     def new_connection(self, origin, dest, form):
-        if dest not in self.graph[origin][10]:
-            self.graph[origin][10].append(dest)
-        if origin not in self.graph[dest][8]:
-            self.graph[dest][8].append(origin)
-        if (self.graph[dest][4] & 0x10) and self.consider_ds_node(origin, 0x10, []):
+        if dest not in self.graph[origin].to_nodes:
+            self.graph[origin].to_nodes.append(dest)
+            self.graph_version += 1
+        if origin not in self.graph[dest].from_nodes:
+            self.graph[dest].from_nodes.append(origin)
+        if (self.graph[dest].form_access & 0x10) and self.consider_ds_node(origin, 0x10, []):
             self.update_ds_access([origin], 0x10, [])  # If dest can reach a DS, origin now can too
         for flag in [0x01, 0x02, 0x04, 0x20]:
-            ds_nodes = self.graph[origin][9] if flag == 0x20 else []
-            if (self.graph[origin][4] & flag & form) and self.consider_ds_node(dest, flag, ds_nodes):
+            ds_nodes = self.graph[origin].ds_nodes if flag == 0x20 else []
+            if (self.graph[origin].form_access & flag & form) and self.consider_ds_node(dest, flag, ds_nodes):
                 self.update_ds_access([dest], flag, ds_nodes)  # dest now reachable from origin's DS nodes
         return True
 
@@ -1953,11 +2220,11 @@ class World:
         # Random start location
         if self.start_mode != "South Cape":
             self.start_loc = self.random_start()
-            self.info("Start location: " + str(self.item_locations[self.start_loc][6]))
+            self.info("Start location: %s", self.item_locations[self.start_loc][6])
             if self.start_loc == 47:  # Diamond Mine behind fences: fences are free
-                self.graph[131][1].append(130)
+                self.graph[131].links.append(130)
         if self.start_mode == "South Cape" and not self.entrance_shuffle:
-            self.graph[0][1].append(22)  # Starts in school
+            self.graph[0].links.append(22)  # Starts in school
         else:
             # Connect node 0 to the start; for locs behind orbs, connect to the outer node
             if self.start_loc == 19:
@@ -1966,7 +2233,7 @@ class World:
                 start_node = 136  # Mine
             else:
                 start_node = self.item_locations[self.start_loc][0]
-            self.graph[0][1].append(start_node)
+            self.graph[0].links.append(start_node)
         start_map = self.spawn_locations[self.start_loc][1]
         if start_map in self.maps:
             self.maps[start_map][4] = 1  # Can only start in a dark map if cursed
@@ -1990,7 +2257,7 @@ class World:
         for node in pyramid_portal_nodes:
             # Pyramid portals are free, except in dungeon shuffle where they require Aura but can be used formlessly
             if not self.dungeon_shuffle:
-                self.graph[node][1].append(411)
+                self.graph[node].links.append(411)
             else:
                 new_edge_id = 1+max(self.logic)
                 new_edge = [0, node, 411, 0x0f, [[36, 1]], False]
@@ -2034,11 +2301,12 @@ class World:
         exits_with_logic = set(self.exit_logic[edge][0] for edge in self.exit_logic)
         for exit in exits_with_logic:
             src_node_id = self.exits[exit][3]
-            src_node_type = self.graph[src_node_id][2]
-            src_node_info = self.graph[src_node_id][3]
+            src_node_type = self.graph[src_node_id].type
+            src_node_info = self.graph[src_node_id].info
             new_node_id = 1 + max(self.graph)
-            new_node = [False, [], src_node_type, src_node_info[:], 0, self.exits[exit][10], [], False, [], [], [], [], [], [], [], []]
+            new_node = GraphNode(False, [], src_node_type, src_node_info, 0, self.exits[exit][10])
             self.graph[new_node_id] = new_node
+            self.graph_version += 1
             sister_exit = self.exits[exit][0]
             exit_edges = [e for e in self.exit_logic if self.exit_logic[e][0] == exit]
             for edge in exit_edges:
@@ -2046,10 +2314,10 @@ class World:
                 if self.exit_logic[edge][2] == 0:  # Logic is for room->exit
                     new_edge = [0, src_node_id, new_node_id, 0, self.exit_logic[edge][1][:], False]
                     self.exits[exit][3] = new_node_id  # Exit is from its own node, sister_exit goes to the room
-                    self.graph[new_node_id][1].append(src_node_id)  # Exit->room is free
+                    self.graph[new_node_id].links.append(src_node_id)  # Exit->room is free
                 elif self.exit_logic[edge][2] == 1:  # Logic is for exit->room
                     new_edge = [0, new_node_id, src_node_id, 0, self.exit_logic[edge][1][:], False]
-                    self.graph[src_node_id][1].append(new_node_id)  # Room->exit is free
+                    self.graph[src_node_id].links.append(new_node_id)  # Room->exit is free
                     if sister_exit and self.exits[sister_exit][4] == src_node_id:    # Exit is from the room, sister_exit goes to the new exitnode
                         self.exits[sister_exit][4] = new_node_id
                 elif self.exit_logic[edge][2] == 2:  # Logic blocks both room->exitnode and exitnode->room
@@ -2066,15 +2334,15 @@ class World:
         for loc in self.item_locations:
             if self.item_locations[loc][9]:
                 outer_node_id = self.item_locations[loc][0]
-                outer_node_type = self.graph[outer_node_id][2]
-                outer_node_info = self.graph[outer_node_id][3]
+                outer_node_type = self.graph[outer_node_id].type
+                outer_node_info = self.graph[outer_node_id].info
                 loc_name = self.item_locations[loc][6]
                 new_node_id = 1 + max(self.graph)
-                new_node = [False, [outer_node_id], outer_node_type, outer_node_info[:], 0, loc_name, [], False, [], [],
-                            [], [], [], [], [], []]
+                new_node = GraphNode(False, [outer_node_id], outer_node_type, outer_node_info, 0, loc_name)
                 new_edge_id = 1 + max(self.logic)
                 new_edge = [0, outer_node_id, new_node_id, 0, self.item_locations[loc][9][:], False]
                 self.graph[new_node_id] = new_node
+                self.graph_version += 1
                 self.logic[new_edge_id] = new_edge
                 self.item_locations[loc][0] = new_node_id
 
@@ -2222,6 +2490,9 @@ class World:
                 if self.gem[6] > 3 + self.item_pool[1][0]:
                     unused_edges.append(26)
 
+        # The tables are set up; index what refers to what for pruning and delete_objects
+        self.index_references()
+
         # Dungeon Shuffle.
         # Clean up unused nodes and artificial items
         if not self.dungeon_shuffle:  # if self.dungeon_shuffle == "None" or self.dungeon_shuffle == "Basic":
@@ -2240,14 +2511,21 @@ class World:
             useless_nodes = list(set([self.exits[x][3] for x in useless_exits]))
             useless_edges = []
             useless_node_count = 0
+            node_edges = self.references["node_edges"]
+            linked_from = {}  # Reverse of graph links
+            for p in self.graph:
+                for o in self.graph[p].links:
+                    if o not in linked_from:
+                        linked_from[o] = []
+                    linked_from[o].append(p)
             while useless_node_count < len(useless_nodes):
                 useless_node_count = len(useless_nodes)
                 for i in range(len(useless_nodes)):
                     n = useless_nodes[i]
-                    useless_nodes.extend(self.graph[n][1])
-                    for o in self.graph[n][1]:
-                        useless_nodes.extend([p for p in self.graph if o in self.graph[p][1]])
-                    here_edges = [e for e in self.logic if self.logic[e][1] == n or self.logic[e][2] == n]
+                    useless_nodes.extend(self.graph[n].links)
+                    for o in self.graph[n].links:
+                        useless_nodes.extend(linked_from.get(o, []))
+                    here_edges = list(node_edges.get(n, ()))
                     useless_nodes.extend(
                         [self.logic[e][1] for e in here_edges] + [self.logic[e][2] for e in here_edges])
                     unused_edges.extend(here_edges)
@@ -2277,22 +2555,22 @@ class World:
         for edge in free_edges:
             here_node = self.logic[edge][1]
             other_node = self.logic[edge][2]
-            self.graph[here_node][1].append(other_node)
+            self.graph[here_node].links.append(other_node)
         self.delete_objects(edges=free_edges, with_close=True)
 
         # Incorporate item locations and logic edges into world graph
         for x in self.item_locations:
-            self.graph[self.item_locations[x][0]][11].append(x)
+            self.graph[self.item_locations[x][0]].locations.append(x)
         for y in self.logic:
             if self.logic[y][0] != -1:
-                self.graph[self.logic[y][1]][12].append(y)
-                self.graph[self.logic[y][2]][13].append(y)
+                self.graph[self.logic[y][1]].origin_edges.append(y)
+                self.graph[self.logic[y][2]].dest_edges.append(y)
 
         # Boss Shuffle -- boss_order[n] is the boss of dungeon n, 0<=n<=6, 1<=boss<=7
         if "Boss Shuffle" in self.variant:
             boss_door_exits = [1, 4, 7, 10, 13, 16, 19]
             boss_defeat_exits = [3, 6, 9, 12, 15, 18, 21]
-            self.verbose("Boss order: " + str(self.boss_order))
+            self.verbose("Boss order: %s", self.boss_order)
             for dungeon in range(7):
                 this_dungeon_boss = self.boss_order[dungeon]
                 normal_boss_exit = boss_door_exits[dungeon]
@@ -2304,8 +2582,10 @@ class World:
 
         # Cache the number of item pools, and create empty loc lists for them
         self.item_pool_count = 1 + self.get_max_pool_id()
-        self.open_locations = [[] for _ in range(self.item_pool_count)]
+        self.open_locations = [NodeSet() for _ in range(self.item_pool_count)]
 
+        self.edge_reqs.clear()  # Requirements may have been edited above
+        self.index_requirements()
         self.reset_progress(True)  # Initialize graph with no items or logic
         self.update_graph(True, True, True)  # Build basic graph connections from any unrandomized elements
 
@@ -2322,81 +2602,148 @@ class World:
         del_nodes = [x for x in nodes if x in self.graph and x > 0]
         del_edges = [x for x in edges if x in self.logic]
         del_exits = [x for x in exits if x in self.exits and x not in self.deleted_exits]
+        refs = self.references
         for item in set(del_items):
             self.deleted_item_pool[item] = self.item_pool[item]
-            for node in [n for n in self.graph if item in self.graph[n][6]]:
-                self.graph[node][6].remove(item)
-            affected_edges = [e for e in self.logic if any(item == req[0] for req in self.logic[e][4])]
+            for node in refs["item_nodes"].pop(item, ()):
+                if node in self.graph:
+                    self.graph[node].items_to_remove.remove(item)
+            affected_edges = [e for e in refs["item_edges"].pop(item, ()) if e in self.logic]
             for edge in affected_edges:
                 if with_close:
                     del_edges.append(edge)
                 else:
+                    indexed = edge in self.unmet_reqs
+                    self.unindex_edge(edge)
                     req = next(r for r in self.logic[edge][4] if r[0] == item)
                     self.logic[edge][4].remove(req)
+                    if indexed:
+                        self.index_edge(edge)
             del self.item_pool[item]
+        if del_nodes:
+            # Graph adjacency changes throughout generation, so it isn't indexed; drop the deleted
+            # nodes from every remaining node's adjacency in one pass instead
+            deleted = set(del_nodes)
+            for other_node in self.graph.values():
+                for adjacency in [other_node.links, other_node.from_nodes, other_node.ds_nodes, other_node.to_nodes]:
+                    for node in [n for n in adjacency if n in deleted]:
+                        adjacency.discard(node)
         for node in set(del_nodes):
             self.deleted_graph[node] = self.graph[node]
-            affected_locs = [loc for loc in self.item_locations if self.item_locations[loc][0] == node]
-            affected_nodes = [n for n in self.graph if
-                              node in self.graph[n][1] + self.graph[n][8] + self.graph[n][9] + self.graph[n][10]]
-            affected_edges = [e for e in self.logic if node == self.logic[e][1] or node == self.logic[e][2]]
-            affected_exits = [x for x in self.exits if self.exits[x][3] == node or self.exits[x][4] == node]
-            del_locs.extend(affected_locs)
-            del_edges.extend(affected_edges)
-            for other_node, subidx in itertools.product(affected_nodes, [1, 8, 9, 10]):
-                if node in self.graph[other_node][subidx]:
-                    self.graph[other_node][subidx].remove(node)
-            for exit in affected_exits:
+            del_locs.extend(loc for loc in refs["node_locs"].pop(node, ()) if loc in self.item_locations)
+            del_edges.extend(e for e in refs["node_edges"].pop(node, ()) if e in self.logic)
+            for exit in refs["node_exits"].pop(node, ()):
                 if self.exits[exit][3] == node:
                     self.exits[exit][3] = -1  # Exit source becomes "inaccessible"
                 if self.exits[exit][4] == node:
                     self.exits[exit][4] = -2  # Exit dest becomes "deleted"
             del self.graph[node]
+            self.graph_version += 1
         for loc in set(del_locs):
             self.deleted_item_locations[loc] = self.item_locations[loc]
-            affected_nodes = [n for n in self.graph if loc in self.graph[n][11]]
-            for node in affected_nodes:
-                self.graph[node][11].remove(loc)
+            if self.item_placements is not None:
+                self.item_placements[self.item_locations[loc][3]].discard(loc)
+            node = self.item_locations[loc][0]
+            if node in refs["node_locs"]:
+                refs["node_locs"][node].discard(loc)
+            if node in self.graph:
+                self.graph[node].locations.discard(loc)
             del self.item_locations[loc]
         for edge in set(del_edges):
             self.deleted_logic[edge] = self.logic[edge]
-            affected_nodes = [n for n in self.graph if edge in self.graph[n][12] + self.graph[n][13]]
-            for node in affected_nodes:
-                for subidx in [12, 13]:
-                    if edge in self.graph[node][subidx]:
-                        self.graph[node][subidx].remove(edge)
+            self.unindex_edge(edge)
+            for req in self.logic[edge][4]:
+                if req[0] in refs["item_edges"]:
+                    refs["item_edges"][req[0]].discard(edge)
+            for node in self.logic[edge][1:3]:
+                if node in refs["node_edges"]:
+                    refs["node_edges"][node].discard(edge)
+                if node in self.graph:
+                    self.graph[node].origin_edges.discard(edge)
+                    self.graph[node].dest_edges.discard(edge)
             del self.logic[edge]
         for exit in set(del_exits):
             if self.exits[exit][1] < 0 and self.exits[exit][0] > 0:
                 self.link_exits(exit, self.exits[exit][0], False, False)
             self.deleted_exits[exit] = self.exits[exit]
-            affected_nodes = [n for n in self.graph if exit in self.graph[n][14] + self.graph[n][15]]
-            for node, subidx in itertools.product(affected_nodes, [14, 15]):
-                if exit in self.graph[node][subidx]:
-                    self.graph[node][subidx].remove(exit)
-
-    # Simulate inventory
+            for node in self.exits[exit][3:5]:
+                if node in self.graph:
+                    self.graph[node].origin_exits.discard(exit)
+                    self.graph[node].dest_exits.discard(exit)
+
+    # Builds self.references, reverse indices of the objects that refer to each item and node, so
+    # delete_objects touches only those instead of scanning every table for each deletion. Built once by
+    # initialize when the tables are set up, and kept up to date by delete_objects from then on; nothing
+    # else changes which nodes hold an item to remove, which edges require an item, or which locations,
+    # edges and exits are at a node. Each index maps an ID to a NodeSet of referrers in table order.
+    # (A location, edge or exit is only ever attached to the nodes its own table entry names.)
+    def index_references(self):
+        refs = {"item_nodes": {}, "item_edges": {}, "node_locs": {}, "node_edges": {}, "node_exits": {}}
+
+        def add_ref(index, key, referrer):
+            if key not in refs[index]:
+                refs[index][key] = NodeSet()
+            refs[index][key].add(referrer)
+
+        for n, graph_node in self.graph.items():
+            for item in graph_node.items_to_remove:
+                add_ref("item_nodes", item, n)
+        for edge, edge_def in self.logic.items():
+            for req in edge_def[4]:
+                add_ref("item_edges", req[0], edge)
+            add_ref("node_edges", edge_def[1], edge)
+            add_ref("node_edges", edge_def[2], edge)
+        for loc, loc_def in self.item_locations.items():
+            add_ref("node_locs", loc_def[0], loc)
+        for exit, exit_def in self.exits.items():
+            add_ref("node_exits", exit_def[3], exit)
+            add_ref("node_exits", exit_def[4], exit)
+        self.references = refs
+        return refs
+
+    # Simulate inventory: the collected items that take an inventory slot, less those used up at
+    # item destinations (the first collected copies are the ones used up)
     def get_inventory(self, start_items=[], item_destinations=[], new_nodes=[]):
         if not start_items:
-            start_items = self.items_collected[:]
+            start_items = self.items_collected
         if not item_destinations:
-            item_destinations = self.item_destinations[:]
-        inventory_temp = []
+            item_destinations = self.item_destinations
+        unused_destinations = Counter(item_destinations)
+        inventory = []
         for item in start_items:
             if self.item_pool[item][4]:
-                inventory_temp.append(item)
-        inventory = []
-        while inventory_temp:
-            item = inventory_temp.pop(0)
-            if item in item_destinations:
-                item_destinations.remove(item)
-            else:
-                inventory.append(item)
+                if unused_destinations[item] > 0:
+                    unused_destinations[item] -= 1
+                else:
+                    inventory.append(item)
         return inventory
 
+    # Returns whether an item takes an inventory slot
+    def takes_inventory(self, item):
+        return item in self.item_pool and self.item_pool[item][4]
+
+    # Recounts the running inventory size, after items_collected is replaced
+    def count_inventory(self):
+        self.inventory_size = len(self.get_inventory())
+
+    # Returns the inventory size after also collecting items and reaching item_destinations,
+    # adjusting the running size by only the items involved
+    def get_inventory_size(self, items=[], item_destinations=[]):
+        added = Counter(items)
+        used = Counter(item_destinations)
+        size = self.inventory_size
+        collected_counts = self.items_collected.counts
+        dest_counts = self.item_destinations.counts
+        for item in added.keys() | used.keys():
+            if self.takes_inventory(item):
+                collected_ct = collected_counts.get(item, 0)
+                dest_ct = dest_counts.get(item, 0)
+                size += max(collected_ct + added[item] - dest_ct - used[item], 0) - max(collected_ct - dest_ct, 0)
+        return size
+
     # Takes a random seed and builds out a randomized world
-    def randomize(self, seed_adj=0, printlevel=-1, break_on_error=False, break_on_init=False):
-        self.printlevel = printlevel
+    def randomize(self, seed_adj=0, printlevel=-1, break_on_error=False, break_on_init=False, log_buffer_size=0):
+        self.set_log_level(printlevel, log_buffer_size)
         self.break_on_error = break_on_error
 
         random.seed(self.seed + seed_adj)  # 3229535
@@ -2406,6 +2753,7 @@ class World:
 
         if break_on_init:
             breakpoint()
+        self.start_phase("initialize")
         if not self.initialize():
             self.error("Could not initialize world")
             return False
@@ -2415,16 +2763,19 @@ class World:
 
         # Overworld shuffle
         if "Overworld Shuffle" in self.variant:
+            self.start_phase("overworld_shuffle")
             if not self.shuffle_overworld():
                 self.error("Overworld shuffle failed")
                 return False
 
         # Shuffle exits
         if self.entrance_shuffle:
+            self.start_phase("exit_shuffle")
             if not self.shuffle_exits():
                 self.error("Entrance rando failed")
                 return False
 
+        self.start_phase("ds_population")
         self.reset_progress(True)  # Forget items and logic used for ER/DS skeleton construction
         self.update_graph(True, True, True)  # Rebuild graph connections with exits
 
@@ -2438,7 +2789,7 @@ class World:
 
         # Populate Dark Spaces; all non-DS items are granted so traversal can go to all DS-requiring edges
         self.reset_progress(True)
-        self.items_collected = self.list_typed_items(types=[1], shuffled_only=False, incl_placed=True)
+        self.set_items_collected(self.list_typed_items(types=[1], shuffled_only=False, incl_placed=True))
         if self.orb_rando != "None":
             self.items_collected.extend(self.list_typed_items(types=[5], shuffled_only=False, incl_placed=True))
         self.update_graph(True, True, True)
@@ -2448,6 +2799,7 @@ class World:
         cycle = 0
         while True:
             cycle += 1
+            self.count_metric("ds_cycles")
             if cycle >= MAX_CYCLES:
                 self.error("Couldn't populate DS items for an unknown reason")
                 return False
@@ -2465,7 +2817,7 @@ class World:
             new_nodes = traverse_result[0]
             # A node needs a txform DS if it has an open formful edge, isn't accessible by that form, and the edge goes to an unreached area
             f_missing_nodes = {self.logic[e][1] for e in self.open_edges if not self.edge_formless(e) and not (
-                    self.logic[e][3] & self.graph[self.logic[e][1]][4]) and not self.is_accessible(
+                    self.logic[e][3] & self.graph[self.logic[e][1]].form_access) and not self.is_accessible(
                 self.logic[e][2])}
             if not f_missing_nodes and not ds_items:
                 break  # Success: no DS items left to place and no open formful edges to new areas
@@ -2474,11 +2826,11 @@ class World:
                 # Lock txform DSes to cover nodes that need a form and aren't known to be accessible by that form
                 f_nodes_under_ds_node = {}
                 for node in f_missing_nodes:
-                    for ds_node in self.graph[node][9]:
-                        if not self.graph[ds_node][0]:
+                    for ds_node in self.graph[node].ds_nodes:
+                        if not self.graph[ds_node].visited:
                             continue
-                        ds_loc = next(loc for loc in self.graph[ds_node][11] if self.item_locations[loc][1] == 2)
-                        if self.graph[ds_node][0] and not self.item_locations[ds_loc][2]:
+                        ds_loc = next(loc for loc in self.graph[ds_node].locations if self.item_locations[loc][1] == 2)
+                        if self.graph[ds_node].visited and not self.item_locations[ds_loc][2]:
                             if ds_node not in f_nodes_under_ds_node:
                                 f_nodes_under_ds_node[ds_node] = set()
                             f_nodes_under_ds_node[ds_node].add(node)
@@ -2493,7 +2845,7 @@ class World:
                     if self.item_locations[lock_loc][3]:
                         self.unfill_item(lock_loc)
                     self.item_locations[lock_loc][7] = 0
-                    self.info(" Locked for transform: " + str(self.item_locations[lock_loc][6]))
+                    self.info(" Locked for transform: %s", self.item_locations[lock_loc][6])
                     made_progress = True
                     f_missing_nodes = f_missing_nodes.difference(f_nodes_under_ds_node[lock_node])
                     for covered_node in f_nodes_under_ds_node[lock_node]:
@@ -2507,7 +2859,7 @@ class World:
                 if len(f_missing_nodes) > 0 and not made_progress and not ds_items:
                     # Can't expand formful access, and there are no more items to grant progress, so we're stuck
                     for n in f_missing_nodes:
-                        self.warn("No formless access from or formful access to " + str(n) + " " + self.graph[n][5])
+                        self.warn("No formless access from or formful access to %s %s", n, self.graph[n].name)
                     if self.logic_mode == "Completable":
                         self.error("World is unsolvable: missing form access")
                         return False
@@ -2529,7 +2881,7 @@ class World:
                             idx = x[1]
                     items = progression_list.pop(idx)
                     if self.forward_fill(items, item_locations, False, self.logic_mode == "Chaos"):
-                        self.info(" Placed " + self.item_pool[items[0]][3] + " for progression")
+                        self.info(" Placed %s for progression", self.item_pool[items[0]][3])
                         made_progress = True
                         for item in items:
                             ds_items.remove(item)
@@ -2550,6 +2902,7 @@ class World:
                     self.error("Dark Spaces were populated without logging progress")
                 return False
         # Randomly place non-progression items in the open graph
+        self.start_phase("item_placement")
         self.info("Placing junk...")
         non_prog_items = self.list_typed_items(types=[], progress_type=3, shuffled_only=True)
         for item in non_prog_items:
@@ -2568,19 +2921,20 @@ class World:
         cycle = 0
         while not done:
             cycle += 1
-            self.info(" Cycle " + str(cycle))
+            self.count_metric("placement_cycles")
+            self.info(" Cycle %s", cycle)
             if cycle > MAX_CYCLES:
                 self.error("Max cycles exceeded in item placement")
                 return False
             self.traverse()
             # Good items resist being placed early; if starting in a town with lots of checks available, very good items can't be placed early at all
-            discovered_locs = [loc for loc in self.item_locations if self.graph[self.item_locations[loc][0]][0] and self.item_locations[loc][8] > cycle]
+            discovered_locs = [loc for loc in self.item_locations if self.graph[self.item_locations[loc][0]].visited and self.item_locations[loc][8] > cycle]
             for loc in discovered_locs:
                 self.item_locations[loc][8] = cycle
                 for item in high_penalty_items:
                     if (item not in self.item_locations[loc][4]) and (cycle < (self.item_pool[item][7] * 1.5 / PROGRESS_ADJ[self.difficulty])) and (self.spawn_locations[self.start_loc][0] == "Safe"):
                         self.item_locations[loc][4].append(item)
-            if len(self.get_inventory()) > MAX_INVENTORY:
+            if self.inventory_size > MAX_INVENTORY:
                 goal = False
                 self.warn("Inventory capacity exceeded")
             else:
@@ -2593,9 +2947,9 @@ class World:
                 progression_result = self.progression_list(penalty_threshold=trial_penalty)
                 trial_penalty *= 2
             self.verbose("Progression options: {")
-            self.verbose(" " + str(progression_result[0]))  # Available
-            self.verbose(" " + str(progression_result[1]))  # Not enough locs
-            self.verbose(" " + str(progression_result[2]))  # Not enough inv space
+            self.verbose(" %s", progression_result[0])  # Available
+            self.verbose(" %s", progression_result[1])  # Not enough locs
+            self.verbose(" %s", progression_result[2])  # Not enough inv space
             self.verbose("}")
             progression_list = progression_result[0]
             is_progression = (progression_result != [[], [], []])
@@ -2617,7 +2971,7 @@ class World:
                     items = progression_list.pop(idx)
                     if self.forward_fill(items, item_locations, False, self.logic_mode == "Chaos", True):
                         progress = True
-                        self.info("  Placed " + str(len(items)) + " items successfully")
+                        self.info("  Placed %s items successfully", len(items))
                 if not progress:
                     self.info("Removing some junk to make room...")
                     if not self.make_room(progression_result):
@@ -2628,6 +2982,7 @@ class World:
         junk_items = self.list_typed_items(types=[], shuffled_only=True)
         self.random_fill(junk_items, item_locations, False)
 
+        self.start_phase("verification")
         self.info("Verifying completion...")
 
         self.reset_progress(True)
@@ -2635,19 +2990,20 @@ class World:
         self.traverse([])  # Fresh traverse with no nodes queued to visit
 
         if self.logic_mode == "Completable" and self.goal != "Red Jewel Hunt":
-            completed = all(self.graph[node][0] for node in self.graph if node not in self.optional_nodes)
+            completed = all(self.graph[node].visited for node in self.graph if node not in self.optional_nodes)
         else:
-            completed = self.graph[492][0]
+            completed = self.graph[492].visited
         if not completed:
             # self.print_graph()
-            unreachable = [node for node in self.graph if not self.graph[node][0] and node not in self.optional_nodes]
+            unreachable = [node for node in self.graph if not self.graph[node].visited and node not in self.optional_nodes]
             for node in unreachable:
-                self.warn("Can't reach node " + str(node) + " " + str(self.graph[node]))
+                self.warn("Can't reach node %s %s", node, self.graph[node])
             self.error("Seed failed, trying again...")
             return False
 
+        self.start_phase("hints")
         self.info("Writing hints...")
-        placement_log = self.placement_log[:]
+        placement_log = list(self.placement_log.values())
         random.shuffle(placement_log)
         self.in_game_spoilers(placement_log)
 
@@ -2656,10 +3012,10 @@ class World:
         return True
 
     def print_graph(self):
-        self.info("Open edges: " + str(self.open_edges))
-        self.info("Open locations: " + str(self.open_locations))
+        self.info("Open edges: %s", self.open_edges)
+        self.info("Open locations: %s", self.open_locations)
         for node in self.graph:
-            self.info(str(node) + " " + str(self.graph[node]))
+            self.info("%s %s", node, self.graph[node])
 
     # Prepares dataset to give in-game spoilers
     def in_game_spoilers(self, placement_log=[]):
@@ -2770,19 +3126,19 @@ class World:
             kara_txt = "Ankor Wat"
 
         self.info("")
-        self.info("Seed                                   >  " + str(self.seed))
-        self.info("Statues Required                       >  " + str(self.statues))
-        self.info("Kara Location                          >  " + str(kara_txt))
-        self.info("Jeweler Reward Amounts                 >  " + str(self.gem))
-        self.info("Inca Tile (column, row)                >  " + str(self.incatile))
-        self.info("Hieroglyph Order                       >  " + str(self.hieroglyphs))
+        self.info("Seed                                   >  %s", self.seed)
+        self.info("Statues Required                       >  %s", self.statues)
+        self.info("Kara Location                          >  %s", kara_txt)
+        self.info("Jeweler Reward Amounts                 >  %s", self.gem)
+        self.info("Inca Tile (column, row)                >  %s", self.incatile)
+        self.info("Hieroglyph Order                       >  %s", self.hieroglyphs)
         self.info("")
 
         for x in self.item_locations:
             item = self.item_locations[x][3]
             location_name = self.item_locations[x][6]
             item_name = self.item_pool[item][3]
-            self.info(str(location_name) + "  >  " + str(item_name))
+            self.info("%s  >  %s", location_name, item_name)
 
     # Generate assembly define dict based on World state
     def populate_asar_defines(self):
@@ -2949,7 +3305,7 @@ class World:
         # If uncursed, add logic edges for darkness
         if not self.darkroom_cursed:
             dark_nodes = [n for n in self.graph if
-                          any(darkroom == self.graph[n][3][3] for darkroom in self.all_darkrooms)]
+                          any(darkroom == self.graph[n].info[3] for darkroom in self.all_darkrooms)]
             dark_exits = [x for x in self.exits if self.exits[x][3] in dark_nodes]
             for exit in dark_exits:
                 new_logic_id = 1 + max(self.exit_logic)
@@ -3028,24 +3384,26 @@ class World:
         self.overworld_menus[18][0] = new_continents[4][0]
         self.overworld_menus[19][0] = new_continents[4][1]
 
-        self.graph[10][1].clear()
-        self.graph[11][1].clear()
-        self.graph[12][1].clear()
-        self.graph[13][1].clear()
-        self.graph[14][1].clear()
+        self.graph[10].links.clear()
+        self.graph[11].links.clear()
+        self.graph[12].links.clear()
+        self.graph[13].links.clear()
+        self.graph[14].links.clear()
 
-        self.graph[10][10].clear()
-        self.graph[11][10].clear()
-        self.graph[12][10].clear()
-        self.graph[13][10].clear()
-        self.graph[14][10].clear()
+        self.graph[10].to_nodes.clear()
+        self.graph[11].to_nodes.clear()
+        self.graph[12].to_nodes.clear()
+        self.graph[13].to_nodes.clear()
+        self.graph[14].to_nodes.clear()
+        self.graph_version += 1
 
         # Add new overworld to the graph
         for entry in self.overworld_menus:
             new_entry = self.overworld_menus[entry][0]
-            self.graph[self.overworld_menus[entry][2]][1].append(self.overworld_menus[new_entry][3])
-            self.graph[self.overworld_menus[new_entry][3]][1].remove(self.overworld_menus[new_entry][2])
-            self.graph[self.overworld_menus[new_entry][3]][1].append(self.overworld_menus[entry][2])
+            self.graph[self.overworld_menus[entry][2]].links.append(self.overworld_menus[new_entry][3])
+            self.graph[self.overworld_menus[new_entry][3]].links.remove(self.overworld_menus[new_entry][2])
+            self.graph[self.overworld_menus[new_entry][3]].links.append(self.overworld_menus[entry][2])
+        self.graph_version += 1
 
         return True
 
@@ -3178,6 +3536,8 @@ class World:
         hieroglyphs=[1, 2, 3, 4, 5, 6], boss_order=[1, 2, 3, 4, 5, 6, 7]
     ):
         self.errorlog = []
+        self.set_log_level()
+        self.metrics = None  # Optional Metrics; see attach_metrics
         self.seed = settings.seed
         self.race_mode = settings.race_mode
         self.statues = statues
@@ -3301,7 +3661,7 @@ class World:
         self.gem = gem
         self.incatile = incatile
         self.hieroglyphs = hieroglyphs
-        self.placement_log = []
+        self.placement_log = {}  # Location -> [item, location], in placement order
         self.exit_log = []
         self.spoilers = []
         self.base_item_counts = {}
@@ -3312,9 +3672,19 @@ class World:
         self.optional_nodes = [-2, -1, 491, 600, 601, 602, 604, 605, 606, 607, 800, 801, 802, 803]  # Artificial nodes, not required by competable logic
         self.map_patches = []
         self.visited = []
-        self.items_collected = []
-        self.item_destinations = []
-        self.open_locations = []  # Pool sublists are added to this in initialization
+        self.items_collected = Inventory([], self.update_item_counts)
+        self.edge_reqs = {}  # Compiled logic requirements; see edge_requirements
+        self.blocked_edges = {}  # Form access that last blocked each frontier edge; see block_edge
+        self.req_edges = {}  # Item -> [[edge, qty], ...] requiring it; see index_requirements
+        self.unmet_reqs = {}  # Edge -> number of its requirements not in items_collected
+        self.graph_version = 0  # Bumped whenever graph nodes or their links or to_nodes change
+        self.linked_from_cache = []  # [graph_version, reverse of graph links]; see get_linked_from
+        self.access_class_cache = []  # [graph_version, access classes]; see get_access_classes
+        self.item_destinations = Inventory([], self.update_destination_counts)
+        self.inventory_size = 0  # Inventory items collected and not yet used up; see get_inventory
+        self.open_locations = []  # Pool NodeSets are added to this in initialization
+        self.item_placements = None  # Item -> NodeSet of locations holding it; see count_placed
+        self.references = {}  # Reverse indices of the world tables; see index_references
         self.open_edges = []
         self.graph_viz = None
         self.all_darkrooms = []
@@ -3954,6 +4324,7 @@ class World:
         #                   14: [origin_exits],
         #                   15: [dest_exits]
         #                   ] }
+        # Entries are converted to GraphNodes (see graph.py), whose named fields follow this order.
         self.deleted_graph = {}
         self.graph = {
             -2: [False, [], 0, [0, 0, 0, 0], 0, "Deleted Node", [], False, [], [], [], [], [], [], [], []],
@@ -4544,6 +4915,7 @@ class World:
             803: [False, [], 0, [0,0,0,0], 0, "Killer 6 logical access", [], False, [], [], [], [], [], [], [], []]
 
         }
+        self.graph = {node: GraphNode(*self.graph[node]) for node in self.graph}
 
         # Shell logical paths for the world graph. Edges for exits etc. are added during initialization.
         # IsBidirectional is only used during initialization, and is False afterward.
@@ -6,3 +6,8 @@ class RomNotFoundError(Exception):
 class OffsetError(Exception):
     """Raised when the ROM offset does not match"""
     pass
+
+
+class AssetBundleError(Exception):
+    """Raised when a packed asset bundle is invalid or for another version"""
+    pass
@@ -0,0 +1,114 @@
+import itertools
+
+
+# Insertion-ordered set of node/edge/location/exit IDs, used for a graph node's adjacency data.
+# Membership tests, adds and removals are O(1) dict operations, while iteration follows insertion
+# order just like the lists these replace, so traversal order (and therefore seed output) is unchanged.
+# The list-style append/extend/remove names are kept so callers read the same as before.
+class NodeSet(dict):
+    __slots__ = ()
+
+    def __init__(self, ids=()):
+        super().__init__(zip(ids, itertools.repeat(None)))
+
+    def append(self, id):
+        self[id] = None
+
+    def add(self, id):
+        self[id] = None
+
+    def extend(self, ids):
+        for id in ids:
+            self[id] = None
+
+    def remove(self, id):
+        del self[id]
+
+    def discard(self, id):
+        self.pop(id, None)
+
+    def copy(self):
+        return NodeSet(self)
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+# Returns the strongly connected components of a directed graph, given as a dict of node: successors,
+# as a dict of node: component ID. Iterative Tarjan, so it's linear in nodes plus edges and doesn't
+# recurse on long chains. Successors that aren't keys of the dict are ignored.
+def strongly_connected_components(successors):
+    index = {}
+    lowlink = {}
+    component = {}
+    stack = []
+    on_stack = set()
+    count = 0
+    for root in successors:
+        if root in index:
+            continue
+        index[root] = lowlink[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(successors[root]))]
+        while work:
+            node, children = work[-1]
+            for child in children:
+                if child not in successors:
+                    continue
+                if child not in index:
+                    index[child] = lowlink[child] = len(index)
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(successors[child])))
+                    break
+                elif child in on_stack:
+                    lowlink[node] = min(lowlink[node], index[child])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component[member] = count
+                        if member == node:
+                            break
+                    count += 1
+    return component
+
+
+# A region in World.graph. Constructed positionally from the shell graph's 16-slot entries;
+# see the format notes on World.graph for the meaning of each field.
+class GraphNode:
+    __slots__ = ("visited", "links", "type", "info", "form_access", "name", "items_to_remove", "force_will",
+                 "from_nodes", "ds_nodes", "to_nodes", "locations", "origin_edges", "dest_edges", "origin_exits",
+                 "dest_exits")
+
+    def __init__(self, visited=False, links=(), type=0, info=(0, 0, 0, 0), form_access=0, name="",
+                 items_to_remove=(), force_will=False, from_nodes=(), ds_nodes=(), to_nodes=(), locations=(),
+                 origin_edges=(), dest_edges=(), origin_exits=(), dest_exits=()):
+        self.visited = visited                        # Traversed flag
+        self.links = NodeSet(links)                   # Nodes reachable from here with no logic requirements
+        self.type = type                              # 0=other/misc, 1=exterior, 2=interior, 3=roof
+        self.info = list(info)                        # [continentID, areaID, layer, MapID]
+        self.form_access = form_access                # Form/DS access flags (0x01/0x02/0x04/0x10/0x20)
+        self.name = name
+        self.items_to_remove = list(items_to_remove)  # Items consumed on reaching this node
+        self.force_will = force_will                  # Only Will can be here
+        self.from_nodes = NodeSet(from_nodes)         # Nodes that can reach this one, with logic
+        self.ds_nodes = NodeSet(ds_nodes)             # DS nodes from which this is reachable formlessly
+        self.to_nodes = NodeSet(to_nodes)             # Nodes reachable from this one, with logic
+        self.locations = NodeSet(locations)           # Item locations in this node
+        self.origin_edges = NodeSet(origin_edges)     # Logic edges starting here
+        self.dest_edges = NodeSet(dest_edges)         # Logic edges ending here
+        self.origin_exits = NodeSet(origin_exits)     # Exits leaving from here
+        self.dest_exits = NodeSet(dest_exits)         # Exits arriving here
+
+    # Same layout as the shell graph entries, for logs and profile dumps
+    def __repr__(self):
+        return repr([self.visited, self.links, self.type, self.info, self.form_access, self.name,
+                     self.items_to_remove, self.force_will, self.from_nodes, self.ds_nodes, self.to_nodes,
+                     self.locations, self.origin_edges, self.dest_edges, self.origin_exits, self.dest_exits])
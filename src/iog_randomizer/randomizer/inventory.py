@@ -0,0 +1,82 @@
+from collections import Counter
+
+
+# A list of items (collected items, or items used up at destinations) that also keeps a running
+# count of each item, so requirement and inventory checks compare counts instead of copying and
+# scanning the list. Only the mutators the
+# randomizer uses keep the counts in sync; don't assign to slices or indices directly.
+# If given, on_change(item, old count, new count) is called whenever an item's count changes.
+class Inventory(list):
+    __slots__ = ("counts", "on_change")
+
+    def __init__(self, items=(), on_change=None):
+        super().__init__(items)
+        self.counts = Counter(self)
+        self.on_change = on_change
+
+    def append(self, item):
+        super().append(item)
+        self.add_count(item, 1)
+
+    def extend(self, items):
+        items = list(items)
+        super().extend(items)
+        for item in items:
+            self.add_count(item, 1)
+
+    def __iadd__(self, items):
+        self.extend(items)
+        return self
+
+    def insert(self, index, item):
+        super().insert(index, item)
+        self.add_count(item, 1)
+
+    def remove(self, item):
+        super().remove(item)
+        self.add_count(item, -1)
+
+    def pop(self, index=-1):
+        item = super().pop(index)
+        self.add_count(item, -1)
+        return item
+
+    def clear(self):
+        super().clear()
+        old_counts = list(self.counts.items())
+        self.counts.clear()
+        if self.on_change is not None:
+            for item, ct in old_counts:
+                if ct:
+                    self.on_change(item, ct, 0)
+
+    def count(self, item):
+        return self.counts[item]
+
+    def __contains__(self, item):
+        return self.counts.get(item, 0) > 0
+
+    # Adjusts an item's running count and reports the change
+    def add_count(self, item, delta):
+        old = self.counts[item]
+        self.counts[item] = old + delta
+        if self.on_change is not None:
+            self.on_change(item, old, old + delta)
+
+
+# Merges a logic requirement list ([[item, qty], ...], possibly naming an item more than once)
+# into a tuple of (item, total qty) pairs. Non-positive quantities require nothing.
+def compile_requirements(reqs):
+    totals = {}
+    for item, qty in reqs:
+        if qty > 0:
+            totals[item] = totals.get(item, 0) + qty
+    return tuple(totals.items())
+
+
+# Returns whether counts (item -> qty) covers every (item, qty) pair in reqs
+def has_requirements(counts, reqs):
+    for item, qty in reqs:
+        if counts.get(item, 0) < qty:
+            return False
+    return True
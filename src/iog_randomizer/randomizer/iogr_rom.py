@@ -1,4 +1,3 @@
-import copy
 import hashlib
 import json
 import logging
@@ -7,16 +6,22 @@ import random
 import sys
 
 from . import asar
+from .assets import get_asset_bundle
 from .classes import World
 from .errors import OffsetError
 from .models.enums import *
 from .models.randomizer_data import RandomizerData
+from .patch_writer import create_bps, create_ips, create_legacy_patch, get_patch_records
 
 VERSION = "5.1.5"
 MAX_RANDO_RETRIES = 50
 OUTPUT_FOLDER: str = os.path.dirname(os.path.realpath(
     __file__)) + os.path.sep + ".." + os.path.sep + ".." + os.path.sep + "data" + os.path.sep + "output" + os.path.sep
 
+# Every seed assembles the whole iogr.asr tree with its own defines; only the asar session, which holds
+# the zero-padded base image it resets to before each patch, is kept per process.
+_asar_sessions = {}  # (VERSION, base ROM md5): asar.Session patching over the expanded base ROM
+
 
 def generate_filename(settings: RandomizerData, extension: str):
     def getDifficulty(difficulty):
@@ -154,6 +159,18 @@ def generate_filename(settings: RandomizerData, extension: str):
     return filename
 
 
+# Loads the platform's asar library; repeat calls reuse the already-loaded library
+def load_asar():
+    if os.name != "nt":
+        asar.init(os.path.dirname(__file__) + os.path.sep + "asar-x64.so")
+    else:  # Windows
+        os.add_dll_directory(os.path.dirname(__file__))
+        if sys.maxsize > 2 ** 32:  # 64-bit
+            asar.init("asar-x64.dll")
+        else:  # 32-bit
+            asar.init("asar-x86.dll")
+
+
 class Randomizer:
     statues_required = 0
 
@@ -166,11 +183,10 @@ class Randomizer:
         data_file.close()
         if len(self.original_rom_data) == 0x200200:
             self.original_rom_data = self.original_rom_data[0x200:]  # Strip the 512-byte header
+        self.base_hash = hashlib.md5(self.original_rom_data).hexdigest()
         if len(self.original_rom_data) == 0x200000:
             # Validate a 2MB input
-            basehash = hashlib.md5()
-            basehash.update(self.original_rom_data)
-            if basehash.hexdigest() != 'a7c7a76b4d6f6df389bd631757b91b76':
+            if self.base_hash != 'a7c7a76b4d6f6df389bd631757b91b76':
                 raise OffsetError
         elif len(self.original_rom_data) != 0x400000:
             # If caller gives a 4MB input, assume it knows what it's doing; otherwise fail
@@ -183,6 +199,11 @@ class Randomizer:
 
         logging.basicConfig(filename=log_file_path, filemode='w', format='%(message)s', level=logging.DEBUG)
         self.logger = logging.getLogger("IOGR")
+        self.metrics = None  # Set to a Metrics object to collect timings and counters from generate_rom
+        self.log_buffer_size = 0  # If set, the last this-many World log messages of a failed attempt go to the log file
+        self.written_blocks = []  # [pc offset, byte count] of each block asar wrote in the last generate_rom
+        self.patch_records = None  # Patch records for the last generate_rom, built on first use
+        self.asset_bundle_path = ""  # If set, asar reads its sources from this packed bundle instead of the package folder
 
     def generate_rom(self, filename: str, settings: RandomizerData, profile_base_filepath=""):
         self.asar_defines = {"DummyRandomizerDefine": "DummyRandomizerDefine"}
@@ -614,10 +635,21 @@ class Randomizer:
             elif self.seed_adj > 0:
                 if settings.printlevel.value > -1:
                     print("Trying again... attempt", self.seed_adj + 1)
+            self.__start_phase__("world_init")
             self.w = World(settings, statues_required, statues, statue_req, kara_location, gem,
                            [inca_x + 1, inca_y + 1], hieroglyph_order, boss_order)
+            if self.metrics is not None:
+                self.w.attach_metrics(self.metrics)
             done = self.w.randomize(self.seed_adj, settings.printlevel.value, settings.break_on_error,
-                                    settings.break_on_init)
+                                    settings.break_on_init, self.log_buffer_size)
+            self.__start_phase__(None)
+            if not done and self.log_buffer_size > 0:
+                self.logger.debug("Attempt " + str(self.seed_adj + 1) + " failed; last log messages:")
+                for m in self.w.dump_log_buffer():
+                    self.logger.debug(m)
+            if not done and self.metrics is not None:
+                errors = [m for m in self.w.errorlog if m.startswith("Error: ")]
+                self.metrics.count_retry(errors[-1][7:] if errors else "Unknown")
             if profile_base_filepath != "":
                 val_messages = self.w.validate()
                 f = open(profile_base_filepath + "_" + format(self.seed_adj, "02") + ".txt", "w")
@@ -648,7 +680,9 @@ class Randomizer:
                 f.write("\n\n")
                 f.close()
             self.seed_adj += 1
+        self.__start_phase__("spoiler")
         self.w.generate_spoiler(VERSION)
+        self.__start_phase__("asar_defines")
         self.w.populate_asar_defines()
         for wdef in self.w.asar_defines:
             self.asar_defines[wdef] = self.w.asar_defines[wdef]
@@ -731,11 +765,6 @@ class Randomizer:
         ##########################################################################
         #            Pass all defines to assembler and return patch
         ##########################################################################
-        if len(self.original_rom_data) == 0x200000:
-            romdata = copy.deepcopy(self.original_rom_data) + bytearray(0x200000)
-        else:  # Caller provided a pre-expanded input
-            romdata = copy.deepcopy(self.original_rom_data)
-
         self.asar_defines["SettingBossShuffle"] = 1 if settings.boss_shuffle else 0
         self.asar_defines["SettingInfiniteInventory"] = 1 if settings.infinite_inventory else 0
         self.asar_defines["SettingEarlyFirebird"] = 1 if settings.firebird else 0
@@ -765,16 +794,8 @@ class Randomizer:
 
         for d in self.asar_defines:
             self.asar_defines[d] = str(self.asar_defines[d])  # The library requires defines to be string type.
-        if os.name != "nt":
-            asar.init(os.path.dirname(__file__) + os.path.sep + "asar-x64.so")
-        else:  # Windows
-            os.add_dll_directory(os.path.dirname(__file__))
-            if sys.maxsize > 2 ** 32:  # 64-bit
-                asar.init("asar-x64.dll")
-            else:  # 32-bit
-                asar.init("asar-x86.dll")
-        self.asar_patch_result = asar.patch(os.path.dirname(__file__) + os.path.sep + "iogr.asr", romdata, [], True,
-                                            self.asar_defines)
+        self.__start_phase__(None)
+        self.asar_patch_result = self.__assemble__()
 
         if self.asar_patch_result[0]:
             return self.asar_patch_result
@@ -787,19 +808,15 @@ class Randomizer:
         self.generate_rom(filename, settings)
         if not self.asar_patch_result[0]:
             return False
-        legacy_patch = []
-        legacy_idx = 0
-        new_rom_data = self.asar_patch_result[1]
-        import ips
-        ips_patch = ips.Patch.create(self.original_rom_data, new_rom_data)
-        for record in ips_patch.records:
-            if record.rle_size <= 0:
-                payload = [x for x in record.content]
-            else:
-                payload = [record.content[0] for i in range(record.rle_size)]
-            legacy_patch.append({'index': legacy_idx, 'address': record.offset, 'data': payload})
-            legacy_idx += 1
-        return json.dumps(legacy_patch)
+        return json.dumps(create_legacy_patch(self.__get_patch_records__()))
+
+    # Returns an IPS patch from the base ROM to the last generated ROM; header_size=0x200 makes one for .smc ROMs
+    def generate_ips_patch(self, header_size: int = 0) -> bytes:
+        return create_ips(self.__get_patch_records__(), header_size)
+
+    # Returns a BPS patch from the base ROM to the last generated ROM
+    def generate_bps_patch(self) -> bytes:
+        return create_bps(self.original_rom_data, self.asar_patch_result[1], self.__get_patch_records__())
 
     def generate_spoiler(self) -> str:
         return json.dumps(self.w.spoiler)
@@ -828,6 +845,47 @@ class Randomizer:
             addrdump += d + "\t" + str(int(config_labels[d]) & 0x3fffff) + "\n"
         return addrdump
 
+    # The base ROM zero-padded to the 4MB image asar patches
+    def __get_base_image__(self):
+        if len(self.original_rom_data) == 0x200000:
+            return self.original_rom_data + bytes(0x200000)
+        return self.original_rom_data  # Caller provided a pre-expanded input
+
+    # Assembles the whole asm tree over the base image with self.asar_defines, returning asar's result.
+    # Asar reads the asm tree from the in-memory asset bundle, loaded once per process, not from disk,
+    # and patches in a persistent session that resets its ROM buffer from the base image each time.
+    def __assemble__(self):
+        self.patch_records = None
+        assets = get_asset_bundle(VERSION, self.asset_bundle_path)
+        load_asar()
+        session_key = (VERSION, self.base_hash)
+        if session_key not in _asar_sessions:
+            _asar_sessions[session_key] = asar.Session(self.__get_base_image__())
+        self.__start_phase__("assembly")
+        try:
+            patched, rom_view = _asar_sessions[session_key].patch("iogr.asr", [], True, self.asar_defines, assets)
+            result = (patched, bytes(rom_view))  # The view is reused by the session's next patch
+        finally:
+            self.__start_phase__(None)
+        self.written_blocks = [[block.pcoffset, block.numbytes] for block in asar.getwrittenblocks()]
+        return result
+
+    # Patch records from the base ROM to the last generated ROM, built from asar's written blocks
+    def __get_patch_records__(self):
+        if self.patch_records is None:
+            self.patch_records = get_patch_records(self.original_rom_data, self.asar_patch_result[1],
+                                                   self.written_blocks, self.__get_base_image__())
+        return self.patch_records
+
+    # Starts timing a phase in self.metrics, if set; None just ends the current phase
+    def __start_phase__(self, name):
+        if self.metrics is None:
+            return
+        if name is None:
+            self.metrics.end_phase()
+        else:
+            self.metrics.start_phase(name)
+
     def __get_required_statues__(self, settings: RandomizerData) -> int:
         if settings.goal.value == Goal.RED_JEWEL_HUNT.value:
             return 0
@@ -0,0 +1,86 @@
+import time
+import tracemalloc
+
+
+# Wall time (and, if trace_memory, peak traced memory) for each phase of seed generation, plus
+# event counters. Phases run one after another: starting a phase ends the current one, and a
+# phase entered more than once (e.g. on a retry) accumulates. With trace_memory, the caller is
+# responsible for tracemalloc.start()/stop() around the run.
+class Metrics:
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.phases = {}  # Phase name: {"time": seconds, "runs": count[, "peak_memory": bytes]}
+        self.counters = {}  # Counter name: count
+        self.retry_reasons = {}  # Error that ended a failed attempt: count
+        self.current_phase = None
+        self.phase_start = 0.0
+
+    # Ends the current phase, if any, and starts timing the named one
+    def start_phase(self, name):
+        self.end_phase()
+        self.current_phase = name
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        self.phase_start = time.perf_counter()
+
+    # Ends the current phase, if any, adding it to that phase's totals
+    def end_phase(self):
+        if self.current_phase is None:
+            return
+        elapsed = time.perf_counter() - self.phase_start
+        if self.current_phase not in self.phases:
+            self.phases[self.current_phase] = {"time": 0.0, "runs": 0}
+            if self.trace_memory:
+                self.phases[self.current_phase]["peak_memory"] = 0
+        phase = self.phases[self.current_phase]
+        phase["time"] += elapsed
+        phase["runs"] += 1
+        if self.trace_memory:
+            phase["peak_memory"] = max(phase["peak_memory"], tracemalloc.get_traced_memory()[1])
+        self.current_phase = None
+
+    # Adds n to a named counter
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    # Records why an attempt failed and had to be retried
+    def count_retry(self, reason):
+        self.count("retries")
+        self.retry_reasons[reason] = self.retry_reasons.get(reason, 0) + 1
+
+    # Total time over all finished phases
+    def total_time(self):
+        return sum(phase["time"] for phase in self.phases.values())
+
+    # Plain-dict form, for JSON output
+    def to_dict(self):
+        return {"total_time": self.total_time(), "phases": self.phases, "counters": self.counters,
+                "retry_reasons": self.retry_reasons}
+
+    # Human-readable summary, one line per phase/counter/retry reason
+    def report(self):
+        lines = ["Total: " + format(self.total_time(), ".3f") + "s"]
+        for name, phase in self.phases.items():
+            line = " " + name + ": " + format(phase["time"], ".3f") + "s"
+            if phase["runs"] > 1:
+                line += " over " + str(phase["runs"]) + " runs"
+            if "peak_memory" in phase:
+                line += ", peak " + format(phase["peak_memory"] / 1048576, ".1f") + " MiB"
+            lines.append(line)
+        for name, count in self.counters.items():
+            lines.append(" " + name + ": " + str(count))
+        for reason, count in self.retry_reasons.items():
+            lines.append(" retried " + str(count) + "x after: " + reason)
+        return "\n".join(lines)
+
+
+# Replaces obj's method with one that counts its calls in metrics.counters[counter]. Only that
+# instance is changed, so objects that aren't being measured don't pay for the counting.
+def count_calls(obj, method_name, metrics, counter):
+    method = getattr(obj, method_name)
+
+    def counted_method(*args, **kwargs):
+        metrics.counters[counter] = metrics.counters.get(counter, 0) + 1
+        return method(*args, **kwargs)
+
+    setattr(obj, method_name, counted_method)
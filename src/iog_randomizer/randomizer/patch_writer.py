@@ -0,0 +1,157 @@
+import zlib
+
+# Builds IPS, BPS and legacy JSON patches from the blocks asar reports writing, instead of diffing
+# whole ROM images. A patch record is [offset, length, data], where data is either the bytes to write
+# or, for a run of one repeated byte, that byte's int value.
+
+IPS_MAX_OFFSET = 0xFFFFFF
+IPS_EOF_OFFSET = 0x454F46  # A record at this offset would read as the "EOF" footer
+IPS_MAX_LENGTH = 0xFFFF
+RECORD_MERGE_GAP = 6  # Unchanged runs shorter than a record header are cheaper to rewrite than to skip
+
+
+# Returns the records that turn original into patched, given asar's written blocks as
+# [pc offset, byte count] pairs. Only written bytes are compared, so this is linear in the size of the
+# patch rather than the ROM. base is the image asar patched, if original was expanded (padded) first:
+# written bytes are compared against it, and the rest of the expansion past the end of original is
+# emitted as fill records where it's blank.
+def get_patch_records(original: bytes, patched: bytes, written_blocks: list, base: bytes = None):
+    if base is None:
+        base = original
+    ranges = []
+    for offset, length in sorted(written_blocks):
+        end = min(offset + length, len(patched))
+        if offset >= end:
+            continue
+        if ranges and offset <= ranges[-1][1]:
+            ranges[-1][1] = max(ranges[-1][1], end)
+        else:
+            ranges.append([offset, end])
+
+    records = []
+    for start, end in ranges:
+        if start < len(base):
+            records += get_changed_records(base, patched, start, min(end, len(base)))
+        if end > len(base):
+            start = max(start, len(base))
+            records.append([start, end - start, patched[start:end]])
+
+    # Cover the rest of the expansion, which the changed records skip
+    gap_start = len(original)
+    for offset, length, data in records + [[len(patched), 0, b""]]:
+        if offset + length <= gap_start:
+            continue
+        if offset > gap_start:
+            records.append(get_gap_record(patched, gap_start, offset))
+        gap_start = offset + length
+    records.sort(key=lambda record: record[0])
+    return records
+
+
+# Returns records for the bytes in original[start:end] that patched changes, merging nearby runs
+def get_changed_records(original: bytes, patched: bytes, start: int, end: int):
+    if original[start:end] == patched[start:end]:
+        return []
+    records = []
+    run_start = -1
+    run_end = -1
+    for offset in range(start, end):
+        if original[offset] != patched[offset]:
+            if run_start < 0:
+                run_start = offset
+            elif offset - run_end >= RECORD_MERGE_GAP:
+                records.append([run_start, run_end - run_start, patched[run_start:run_end]])
+                run_start = offset
+            run_end = offset + 1
+    if run_start >= 0:
+        records.append([run_start, run_end - run_start, patched[run_start:run_end]])
+    return records
+
+
+# Returns one record for patched[start:end]: a fill record if it's all one byte, otherwise a data record
+def get_gap_record(patched: bytes, start: int, end: int):
+    value = patched[start]
+    if patched.count(value, start, end) == end - start:
+        return [start, end - start, value]
+    return [start, end - start, patched[start:end]]
+
+
+# Builds an IPS patch from records. header_size shifts every offset, e.g. 0x200 for a copier-headered
+# (.smc) ROM.
+def create_ips(records: list, header_size: int = 0):
+    patch = bytearray(b"PATCH")
+    for offset, length, data in records:
+        offset += header_size
+        pos = 0
+        while pos < length:
+            chunk = min(length - pos, IPS_MAX_LENGTH)
+            if offset + pos > IPS_MAX_OFFSET or offset + pos == IPS_EOF_OFFSET:
+                raise ValueError("Can't write an IPS record at offset " + hex(offset + pos))
+            patch += (offset + pos).to_bytes(3, "big")
+            if isinstance(data, int):
+                patch += b"\x00\x00" + chunk.to_bytes(2, "big") + bytes([data])
+            else:
+                patch += chunk.to_bytes(2, "big") + data[pos:pos + chunk]
+            pos += chunk
+    patch += b"EOF"
+    return bytes(patch)
+
+
+# Encodes a number in BPS's variable-length format
+def encode_bps_number(number: int):
+    encoded = bytearray()
+    while True:
+        low = number & 0x7F
+        number >>= 7
+        if number == 0:
+            encoded.append(0x80 | low)
+            return encoded
+        encoded.append(low)
+        number -= 1
+
+
+# Builds a BPS patch from records. Unchanged stretches are copied from the source ROM, data records
+# are written literally, and fill records write their byte once and then copy it forward. Apart from
+# the checksums BPS requires over both ROMs, the work is linear in the size of the patch.
+def create_bps(original: bytes, patched: bytes, records: list):
+    patch = bytearray(b"BPS1")
+    patch += encode_bps_number(len(original))
+    patch += encode_bps_number(len(patched))
+    patch += encode_bps_number(0)  # No metadata
+
+    output_offset = 0
+    target_offset = 0  # Target copies are relative to where the last one left off
+    for offset, length, data in records:
+        if offset > output_offset:
+            patch += encode_bps_number(((offset - output_offset - 1) << 2) | 0)  # SourceRead
+        if isinstance(data, int):
+            patch += encode_bps_number(0 | 1)  # TargetRead of one byte
+            patch.append(data)
+            if length > 1:
+                delta = offset - target_offset
+                patch += encode_bps_number(((length - 2) << 2) | 3)  # TargetCopy
+                patch += encode_bps_number((abs(delta) << 1) | (1 if delta < 0 else 0))
+                target_offset = offset + length - 1
+        else:
+            patch += encode_bps_number(((length - 1) << 2) | 1)  # TargetRead
+            patch += data
+        output_offset = offset + length
+    if output_offset < len(patched):
+        patch += encode_bps_number(((len(patched) - output_offset - 1) << 2) | 0)
+
+    patch += zlib.crc32(original).to_bytes(4, "little")
+    patch += zlib.crc32(patched).to_bytes(4, "little")
+    patch += zlib.crc32(patch).to_bytes(4, "little")
+    return bytes(patch)
+
+
+# Builds the legacy patch format: a list of {'index': int, 'address': int, 'data': list of ints}
+def create_legacy_patch(records: list):
+    legacy_patch = []
+    for index, (offset, length, data) in enumerate(records):
+        if isinstance(data, int):
+            payload = [data] * length
+        else:
+            payload = list(data)
+        legacy_patch.append({'index': index, 'address': offset, 'data': payload})
+    return legacy_patch
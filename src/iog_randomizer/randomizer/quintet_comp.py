@@ -15,77 +15,234 @@
 #
 #
 #
-# This code uses python-bitstring:
-# https://pypi.python.org/pypi/bitstring
+# compress() finds matches with a hash chain over the search window and writes
+# its output through a preallocated bit writer. By default it reproduces the
+# original brute-force tool bit for bit: a greedy parse taking the longest match
+# at each step, preferring the farthest one on ties. With optimal=True it picks
+# the parse that minimizes the output size instead, allowing the longer matches
+# the format supports.
 
 import sys
+from collections import deque
 
-import bitstring
+# Define some useful constants.
+SEARCH_LOG2 = 8
+SEARCH_SIZE = 2 ** SEARCH_LOG2
+LOOKAHEAD_LOG2 = 4
+LOOKAHEAD_SIZE = 2 ** LOOKAHEAD_LOG2
+BIT_PASTCOPY = 0
+BIT_LITERAL = 1
+WINDOW_FILL = 0x20
+# For some reason, the decompressor expects the pastcopy
+# source values to be offset by 0xEF. I have no idea why.
+WINDOW_OFFSET = 0xEF
+MIN_MATCH = 2
+# The length field holds up to LOOKAHEAD_SIZE + 1 (the game's own data uses the
+# whole range), but the original tool stopped one short of LOOKAHEAD_SIZE.
+MAX_MATCH = LOOKAHEAD_SIZE + MIN_MATCH - 1
+COMPAT_MAX_MATCH = LOOKAHEAD_SIZE - 1
+LITERAL_BITS = 1 + 8
+PASTCOPY_BITS = 1 + SEARCH_LOG2 + LOOKAHEAD_LOG2
 
 
-def compress(inBytes):
-    # Define some useful constants.
-    SEARCH_LOG2 = 8
-    SEARCH_SIZE = 2 ** SEARCH_LOG2
-    LOOKAHEAD_LOG2 = 4
-    LOOKAHEAD_SIZE = 2 ** LOOKAHEAD_LOG2
-    BIT_PASTCOPY = 0
-    BIT_LITERAL = 1
+# Writes MSB-first bit fields into a buffer allocated up front.
+class BitWriter:
+    def __init__(self, size):
+        self.buffer = bytearray(size)
+        self.position = 0
+        self.bits = 0
+        self.bitCount = 0
 
-    # Prepare the memory buffer.
-    inBuffer = bytearray(SEARCH_SIZE + len(inBytes))
-    inBuffer[:SEARCH_SIZE] = [0x20] * SEARCH_SIZE
-    inBuffer[SEARCH_SIZE:] = inBytes
+    def write(self, value, bitCount):
+        self.bits = (self.bits << bitCount) | value
+        self.bitCount += bitCount
+        while self.bitCount >= 8:
+            self.bitCount -= 8
+            self.buffer[self.position] = (self.bits >> self.bitCount) & 0xFF
+            self.position += 1
+        self.bits &= (1 << self.bitCount) - 1
 
-    # Prepare for compression.
-    output = bitstring.BitArray()
-    output += bitstring.pack('uintle:16', len(inBytes))
-    currentIndex = SEARCH_SIZE
+    # Returns everything written so far, zero-padding the last byte.
+    def getBytes(self):
+        if self.bitCount > 0:
+            self.write(0, 8 - self.bitCount)
+        return bytes(self.buffer[:self.position])
+
+
+# Hash chains over the search window: each 2-byte key maps to the buffer
+# positions where it starts, oldest first. Positions are added as the
+# compressor passes them and dropped once they fall out of the window.
+class MatchFinder:
+    def __init__(self, inBuffer):
+        self.inBuffer = inBuffer
+        self.chains = {}
+        self.nextIndex = 0
+
+    # Adds every position before index to the chains.
+    def advance(self, index):
+        inBuffer = self.inBuffer
+        last = min(index, len(inBuffer) - 1)
+        for position in range(self.nextIndex, last):
+            key = (inBuffer[position] << 8) | inBuffer[position + 1]
+            chain = self.chains.get(key)
+            if chain is None:
+                self.chains[key] = deque([position])
+            else:
+                chain.append(position)
+        self.nextIndex = max(self.nextIndex, index)
+
+    # Returns (index, length) of the longest match for currentIndex, at most
+    # limit bytes long; on ties, the farthest match wins. Length is 0 if there
+    # is no match of at least MIN_MATCH bytes.
+    def find(self, currentIndex, limit):
+        if limit < MIN_MATCH:
+            return 0, 0
+        inBuffer = self.inBuffer
+        chain = self.chains.get((inBuffer[currentIndex] << 8) | inBuffer[currentIndex + 1])
+        if not chain:
+            return 0, 0
+        windowStart = currentIndex - SEARCH_SIZE
+        while chain and chain[0] < windowStart:
+            chain.popleft()
 
-    # Main compression loop.
-    while currentIndex < len(inBuffer):
         bestIndex = 0
         bestLength = 0
-
-        # Look for a match in the search buffer. (Brute force)
-        for i in range(SEARCH_SIZE):
-            # Don't compare past the end of the lookahead buffer.
-            # Don't compare past the end of the memory buffer.
-            compareLimit = min(
-                LOOKAHEAD_SIZE - 1,
-                len(inBuffer) - currentIndex
-            )
-
-            # Compare the search buffer to the lookahead buffer.
-            # Count how many sequential bytes match (possibly zero).
-            currentLength = 0
-            for j in range(compareLimit):
-                if inBuffer[currentIndex - SEARCH_SIZE + i + j] == inBuffer[currentIndex + j]:
-                    currentLength += 1
-                else:
+        for candidate in chain:
+            # Only a candidate that also matches the byte after the best match so far can beat it.
+            if inBuffer[candidate + bestLength] != inBuffer[currentIndex + bestLength]:
+                continue
+            length = MIN_MATCH
+            while length < limit and inBuffer[candidate + length] == inBuffer[currentIndex + length]:
+                length += 1
+            if length > bestLength:
+                bestIndex = candidate
+                bestLength = length
+                if length == limit:
                     break
+        return bestIndex, bestLength
+
+
+def compress(inBytes, optimal=False):
+    if len(inBytes) > 0xFFFF:
+        raise ValueError("Quintet compression is limited to 65535 bytes of input")
+
+    # Prepare the memory buffer.
+    inBuffer = bytearray([WINDOW_FILL]) * SEARCH_SIZE + bytes(inBytes)
+
+    # Choose the blocks: (source index, length) for a pastcopy, or length 1 for a literal.
+    if optimal:
+        blocks = optimalParse(inBuffer)
+    else:
+        blocks = greedyParse(inBuffer)
+
+    # Write the compressed output.
+    output = BitWriter(2 + (len(inBytes) * LITERAL_BITS + 7) // 8)
+    output.write(len(inBytes) & 0xFF, 8)
+    output.write(len(inBytes) >> 8, 8)
+    currentIndex = SEARCH_SIZE
+    for bestIndex, bestLength in blocks:
+        if bestLength >= MIN_MATCH:
+            output.write(BIT_PASTCOPY, 1)
+            output.write((bestIndex + WINDOW_OFFSET) & 0xFF, SEARCH_LOG2)
+            output.write(bestLength - MIN_MATCH, LOOKAHEAD_LOG2)
+        else:
+            output.write(BIT_LITERAL, 1)
+            output.write(inBuffer[currentIndex], 8)
+        currentIndex += bestLength
+
+    # Return the compressed data.
+    return output.getBytes()
+
 
-            # Keep track of the largest match we've seen.
-            if currentLength > bestLength:
-                bestIndex = currentIndex - SEARCH_SIZE + i
-                bestLength = currentLength
-
-        # Write the next block of compressed output.
-        if bestLength >= 2:
-            # For some reason, the decompressor expects the pastcopy
-            # source values to be offset by 0xEF. I have no idea why.
-            bestIndex = (bestIndex + 0xEF) & 0xFF
-            output += bitstring.pack('bool', BIT_PASTCOPY)
-            output += bitstring.pack('uint:n=v', n=SEARCH_LOG2, v=bestIndex)
-            output += bitstring.pack('uint:n=v', n=LOOKAHEAD_LOG2, v=bestLength - 2)
+# Takes the longest match at each position, as the original tool did, with its
+# length limit.
+def greedyParse(inBuffer):
+    finder = MatchFinder(inBuffer)
+    blocks = []
+    currentIndex = SEARCH_SIZE
+    while currentIndex < len(inBuffer):
+        finder.advance(currentIndex)
+        bestIndex, bestLength = finder.find(currentIndex, min(COMPAT_MAX_MATCH, len(inBuffer) - currentIndex))
+        if bestLength >= MIN_MATCH:
+            blocks.append((bestIndex, bestLength))
             currentIndex += bestLength
         else:
-            output += bitstring.pack('bool', BIT_LITERAL)
-            output += bitstring.pack('uint:8', inBuffer[currentIndex])
+            blocks.append((0, 1))
             currentIndex += 1
+    return blocks
 
-    # Return the compressed data.
-    return output.tobytes()
+
+# Finds the parse with the fewest output bits, using the format's full match
+# length. Any prefix of a match is also a
+# match, so the longest match at each position is enough to price every option.
+def optimalParse(inBuffer):
+    finder = MatchFinder(inBuffer)
+    matches = [(0, 0)] * len(inBuffer)
+    for currentIndex in range(SEARCH_SIZE, len(inBuffer)):
+        finder.advance(currentIndex)
+        matches[currentIndex] = finder.find(currentIndex, min(MAX_MATCH, len(inBuffer) - currentIndex))
+
+    # cost[i] is the fewest bits that encode everything from i on.
+    cost = [0] * (len(inBuffer) + 1)
+    choice = [1] * len(inBuffer)
+    for currentIndex in range(len(inBuffer) - 1, SEARCH_SIZE - 1, -1):
+        bestCost = LITERAL_BITS + cost[currentIndex + 1]
+        bestLength = 1
+        for length in range(MIN_MATCH, matches[currentIndex][1] + 1):
+            lengthCost = PASTCOPY_BITS + cost[currentIndex + length]
+            if lengthCost < bestCost:
+                bestCost = lengthCost
+                bestLength = length
+        cost[currentIndex] = bestCost
+        choice[currentIndex] = bestLength
+
+    blocks = []
+    currentIndex = SEARCH_SIZE
+    while currentIndex < len(inBuffer):
+        bestLength = choice[currentIndex]
+        blocks.append((matches[currentIndex][0], bestLength))
+        currentIndex += bestLength
+    return blocks
+
+
+def decompress(inBytes):
+    outLength = inBytes[0] | (inBytes[1] << 8)
+    window = bytearray([WINDOW_FILL]) * SEARCH_SIZE
+    windowIndex = WINDOW_OFFSET
+    output = bytearray()
+
+    # Read MSB-first bit fields following the length.
+    bytePosition = 2
+    bitPosition = 0
+
+    def readBits(bitCount):
+        nonlocal bytePosition, bitPosition
+        value = 0
+        for i in range(bitCount):
+            value = (value << 1) | ((inBytes[bytePosition] >> (7 - bitPosition)) & 1)
+            bitPosition += 1
+            if bitPosition == 8:
+                bitPosition = 0
+                bytePosition += 1
+        return value
+
+    while len(output) < outLength:
+        if readBits(1) == BIT_LITERAL:
+            value = readBits(8)
+            output.append(value)
+            window[windowIndex] = value
+            windowIndex = (windowIndex + 1) & 0xFF
+        else:
+            sourceIndex = readBits(SEARCH_LOG2)
+            length = readBits(LOOKAHEAD_LOG2) + MIN_MATCH
+            for i in range(length):
+                value = window[sourceIndex]
+                sourceIndex = (sourceIndex + 1) & 0xFF
+                output.append(value)
+                window[windowIndex] = value
+                windowIndex = (windowIndex + 1) & 0xFF
+
+    return bytes(output[:outLength])
 
 
 if __name__ == "__main__":
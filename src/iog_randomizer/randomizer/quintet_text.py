@@ -1,3 +1,6 @@
+import mmap
+import re
+
 MAX_WIDTH = 26
 
 text_words = {
@@ -545,37 +548,95 @@ text_words_inv = {v: k for k, v in text_words.items()}
 text_letters_inv = {v: k for k, v in text_letters.items()}
 
 
+# Encoded strings end at the first of these bytes
+TEXT_TERMINATORS = re.compile(b"[\xC0\xCA]")
+# One decoding unit: a two-byte dictionary word or a single byte
+TEXT_TOKENS = re.compile(b"[\xD6\xD7].|.", re.DOTALL)
+TEXT_READ_SIZE = 256
+
+
+# Decoded text for every token: words and letters from the tables, nothing for box/line control
+# codes, terminators and unknown words, and "?" for unknown letters
+def build_decode_table():
+    table = {}
+    for i in range(256):
+        byte = bytes([i])
+        if byte in [b"\xD3", b"\xC0", b"\xCA", b"\xcb"]:
+            table[byte] = ""
+        elif byte in text_letters_inv:
+            table[byte] = text_letters_inv[byte]
+        else:
+            table[byte] = "?"
+    for prefix in [b"\xD6", b"\xD7"]:
+        for i in range(256):
+            word = prefix + bytes([i])
+            table[word] = text_words_inv.get(word, "")
+    return table
+
+
+text_decode_table = build_decode_table()
+
+
+# Decodes an encoded string (its terminator may be included)
+def decode(str_encoded):
+    return "".join([text_decode_table[token] for token in TEXT_TOKENS.findall(str_encoded)])
+
+
+# Reads and decodes the string at addr in a file, returning [text, encoded length with terminator]
 def get_text(addr, f, rom_offset=0):
-    str_encoded = ""
+    str_encoded = b""
     f.seek(addr + rom_offset)
-    char = ""
-    bytes = 0
-    while char != b"\xC0" and char != b"\xCA":
-        char = f.read(1)
-        str_encoded += char
-        bytes += 1
+    while True:
+        chunk = f.read(TEXT_READ_SIZE)
+        end = TEXT_TERMINATORS.search(chunk)
+        if end is not None:
+            str_encoded += chunk[:end.end()]
+            break
+        str_encoded += chunk
+        if len(chunk) < TEXT_READ_SIZE:
+            break  # Unterminated at the end of the file
+    return [decode(str_encoded), len(str_encoded)]
+
+
+# Maps a ROM file read-only, for the functions below
+def map_rom(rom_path):
+    f = open(rom_path, "rb")
+    rom = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    f.close()
+    return rom
+
+
+# Decodes the string at addr in rom (bytes, bytearray, memoryview or mmap), returning
+# [text, encoded length with terminator]
+def get_text_at(rom, addr, rom_offset=0):
+    start = addr + rom_offset
+    end = TEXT_TERMINATORS.search(rom, start)
+    end = len(rom) if end is None else end.end()
+    return [decode(rom[start:end]), end - start]
+
+
+# Decodes the strings at many addresses, returning a dict of addr: [text, encoded length]
+def get_texts(rom, addrs, rom_offset=0):
+    texts = {}
+    for addr in addrs:
+        if addr not in texts:
+            texts[addr] = get_text_at(rom, addr, rom_offset)
+    return texts
 
-    str_decoded = ""
-    i = 0
-    while i < len(str_encoded):
-        byte = str_encoded[i]
-        i += 1
-        if byte not in [b"\xD3", b"\xC0", b"\xCA"]:
-            if byte in [b"\xD6", b"\xD7"]:
-                word = byte + str_encoded[i]
-                i += 1
-                if word in text_words_inv:
-                    str_decoded += text_words_inv[word]
-                # else:
-                # print "WARNING: Word not recognized >>", word
-            elif byte in text_letters_inv:
-                str_decoded += text_letters_inv[byte]
-            elif byte not in [b"\xcb"]:
-                str_decoded += "?"
-                # print "WARNING: Letter not recognized >>", byte
 
-    # print str_decoded
-    return [str_decoded, bytes]
+# Decodes every string in rom between start and end (ROM addresses), which must hold back-to-back
+# terminated strings, in one pass. Returns a dict of addr: [text, encoded length] in address order.
+def index_text(rom, start, end, rom_offset=0):
+    texts = {}
+    addr = start
+    region = rom[start + rom_offset:end + rom_offset]
+    for terminator in TEXT_TERMINATORS.finditer(region):
+        length = terminator.end() - (addr - start)
+        texts[addr] = [decode(region[addr - start:terminator.end()]), length]
+        addr += length
+    if addr < end:
+        texts[addr] = [decode(region[addr - start:]), end - addr]  # Unterminated tail
+    return texts
 
 
 def encode(unencoded_str, full_box=False):
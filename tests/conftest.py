@@ -0,0 +1,18 @@
+import random
+
+import pytest
+
+from iog_randomizer.randomizer.classes import World
+from iog_randomizer.randomizer.models.randomizer_data import RandomizerData
+
+
+# Returns a function that builds an uninitialized World for a seed and settings
+@pytest.fixture
+def make_world():
+    def build(seed=1, **settings):
+        random.seed(seed)
+        world = World(RandomizerData(seed=seed, **settings))
+        world.break_on_error = False
+        return world
+
+    return build
@@ -0,0 +1,59 @@
+import pytest
+
+from iog_randomizer.randomizer import asar
+from iog_randomizer.randomizer.iogr_rom import load_asar
+
+BASE_ROM = bytes(range(256)) * 0x800  # 512 KiB, a whole number of lorom banks
+
+GROW_PATCH = b"lorom\norg $908000\ndb !value,!value\n"  # writes past the end of the base ROM
+OTHER_GROW_PATCH = b"lorom\norg $908100\ndb !value\n"
+SMALL_PATCH = b"lorom\norg $808010\ndb !value\n"
+
+
+@pytest.fixture(scope="module")
+def session():
+    try:
+        load_asar()
+    except OSError:
+        pytest.skip("asar library not available")
+    return asar.Session(BASE_ROM)
+
+
+# Applies a patch through the session and returns a copy of the result
+def apply(session, source, value):
+    ok, rom = session.patch("main.asm", additional_defines={"value": value}, memory_files={"main.asm": source})
+    assert ok, asar.geterrors()
+    return bytes(rom)
+
+
+# Applies a patch with the one-shot asar.patch, for comparison
+def apply_fresh(source, value):
+    ok, rom = asar.patch("main.asm", BASE_ROM, additional_defines={"value": value},
+                         memory_files={"main.asm": source})
+    assert ok, asar.geterrors()
+    return rom
+
+
+def test_matches_one_shot_patch(session):
+    assert apply(session, SMALL_PATCH, "$AA") == apply_fresh(SMALL_PATCH, "$AA")
+
+
+def test_resets_between_patches(session):
+    grown = apply(session, GROW_PATCH, "$55")
+    assert len(grown) > len(BASE_ROM)
+    assert apply(session, SMALL_PATCH, "$AA") == apply_fresh(SMALL_PATCH, "$AA")
+    assert apply(session, OTHER_GROW_PATCH, "$66") == apply_fresh(OTHER_GROW_PATCH, "$66")
+
+
+def test_changed_defines_apply(session):
+    first = apply(session, SMALL_PATCH, "$11")
+    second = apply(session, SMALL_PATCH, "$22")
+    assert first[0x10] == 0x11 and second[0x10] == 0x22
+    assert first[:0x10] == second[:0x10] == BASE_ROM[:0x10]
+
+
+def test_reset_clears_growth(session):
+    grown = apply(session, GROW_PATCH, "$55")
+    session.reset()
+    assert session.rom_buffer.raw[:len(BASE_ROM)] == BASE_ROM
+    assert not any(session.rom_buffer.raw[len(BASE_ROM):len(grown)])
@@ -0,0 +1,46 @@
+import pytest
+
+from iog_randomizer.randomizer.assets import collect_assets, read_asset_bundle, write_asset_bundle
+from iog_randomizer.randomizer.errors import AssetBundleError
+
+ASSETS = {"iogr.asr": b"incsrc \"iogr_rom.asr\"\n", "bin/sprite.bin": bytes(range(256)) * 3, "empty.txt": b""}
+
+
+def test_round_trip(tmp_path):
+    bundle = str(tmp_path / "assets.bin")
+    write_asset_bundle(bundle, ASSETS, "5.0.0")
+    assert read_asset_bundle(bundle, "5.0.0") == ASSETS
+
+
+def test_package_assets_round_trip(tmp_path):
+    assets = collect_assets()
+    assert "iogr.asr" in assets
+    assert not any("\\" in name for name in assets)
+    bundle = str(tmp_path / "assets.bin")
+    write_asset_bundle(bundle, assets, "5.0.0")
+    assert read_asset_bundle(bundle, "5.0.0") == assets
+
+
+def test_bad_magic(tmp_path):
+    bundle = tmp_path / "assets.bin"
+    bundle.write_bytes(b"NOTABUNDLE" + bytes(32))
+    with pytest.raises(AssetBundleError, match="Not an asset bundle"):
+        read_asset_bundle(str(bundle), "5.0.0")
+
+
+def test_version_mismatch(tmp_path):
+    bundle = str(tmp_path / "assets.bin")
+    write_asset_bundle(bundle, ASSETS, "5.0.0")
+    with pytest.raises(AssetBundleError, match="is for version 5.0.0"):
+        read_asset_bundle(bundle, "5.0.1")
+
+
+def test_truncated(tmp_path):
+    bundle = tmp_path / "assets.bin"
+    write_asset_bundle(str(bundle), ASSETS, "5.0.0")
+    data = bundle.read_bytes()
+    header_size = len(data) - sum(len(name) + len(contents) + 6 for name, contents in ASSETS.items())
+    for size in range(header_size, len(data)):
+        bundle.write_bytes(data[:size])
+        with pytest.raises(AssetBundleError, match="truncated"):
+            read_asset_bundle(str(bundle), "5.0.0")
@@ -0,0 +1,39 @@
+import copy
+
+
+# Returns three unlinked coupled exits, none of them another's return exit
+def pick_coupled_exits(world):
+    coupled = [x for x in world.exits if x > 21 and world.is_exit_coupled(x) and world.exits[x][1:3] == [-1, -1]]
+    return coupled[0], coupled[2], coupled[4]
+
+
+def test_link_exits_links_return_exit(make_world):
+    world = make_world(town_shuffle=True, coupled_exits=True)
+    world.initialize()
+    origin_exit, dest_exit, _ = pick_coupled_exits(world)
+    return_origin, return_dest = world.exits[dest_exit][0], world.exits[origin_exit][0]
+
+    assert world.link_exits(origin_exit, dest_exit, True, False)
+    assert world.exits[origin_exit][1] == dest_exit
+    assert world.exits[return_origin][1] == return_dest
+    assert world.exit_log == [[origin_exit, dest_exit], [return_origin, return_dest]]
+
+    assert world.unlink_exits(origin_exit, dest_exit, True, False)
+    assert world.exits[origin_exit][1] == -1
+    assert world.exits[return_origin][1] == -1
+    assert world.exit_log == []
+
+
+# Unlike before links were staged, a coupled link whose return link fails is rolled back:
+# link_exits returns False and leaves neither direction linked
+def test_link_exits_rolls_back_when_return_link_fails(make_world):
+    world = make_world(town_shuffle=True, coupled_exits=True)
+    world.initialize()
+    origin_exit, dest_exit, other_exit = pick_coupled_exits(world)
+    assert world.link_exits(world.exits[dest_exit][0], other_exit, False, False)  # Occupy the return origin
+    exits_before = copy.deepcopy(world.exits)
+    exit_log_before = copy.deepcopy(world.exit_log)
+
+    assert not world.link_exits(origin_exit, dest_exit, True, True)
+    assert world.exits == exits_before
+    assert world.exit_log == exit_log_before
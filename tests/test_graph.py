@@ -0,0 +1,72 @@
+import random
+
+from iog_randomizer.randomizer.graph import strongly_connected_components
+
+
+# Returns the components as a set of frozensets, independent of component numbering
+def components(successors):
+    by_id = {}
+    for node, component in strongly_connected_components(successors).items():
+        by_id.setdefault(component, set()).add(node)
+    return {frozenset(nodes) for nodes in by_id.values()}
+
+
+def test_strongly_connected_components():
+    successors = {1: [2], 2: [3], 3: [1, 4], 4: [5], 5: [4, 6], 6: [], 7: [7, 99]}
+    assert components(successors) == {frozenset({1, 2, 3}), frozenset({4, 5}), frozenset({6}), frozenset({7})}
+
+
+def test_long_chain_does_not_recurse():
+    successors = {i: [i + 1] for i in range(10000)}
+    successors[10000] = [0]
+    assert components(successors) == {frozenset(range(10001))}
+
+
+# Compares against mutual reachability computed by brute force on random graphs
+def test_random_graphs_match_reachability():
+    rng = random.Random(1)
+    for _ in range(50):
+        nodes = list(range(rng.randint(1, 30)))
+        successors = {x: rng.sample(nodes, rng.randint(0, min(3, len(nodes)))) for x in nodes}
+        reachable = {}
+        for x in nodes:
+            seen, to_visit = {x}, [x]
+            while to_visit:
+                for y in successors[to_visit.pop()]:
+                    if y not in seen:
+                        seen.add(y)
+                        to_visit.append(y)
+            reachable[x] = seen
+        component = strongly_connected_components(successors)
+        for x in nodes:
+            for y in nodes:
+                assert (component[x] == component[y]) == (y in reachable[x] and x in reachable[y])
+
+
+
+# Builds the all-items, all-forms graph that exit shuffling builds its islands on
+def build_full_access_graph(world):
+    world.initialize()
+    world.reset_progress(True)
+    world.set_items_collected([800, 802, 803] + world.list_typed_items(types=[1, 2, 4, 5], shuffled_only=False, incl_placed=True))
+    for node in world.graph:
+        world.graph[node].visited = True
+        world.graph[node].form_access = 0x37
+    world.update_graph(True, False, True)
+
+
+def test_access_classes_match_check_access(make_world):
+    world = make_world(town_shuffle=True, dungeon_shuffle=True, coupled_exits=True)
+    build_full_access_graph(world)
+    access_class = world.get_access_classes()
+    rng = random.Random(1)
+    nodes = list(world.graph)
+    pairs = [(x, y) for x in nodes for y in world.graph[x].to_nodes if x != y]
+    pairs += [tuple(rng.sample(nodes, 2)) for _ in range(2000)]
+    mutual = 0
+    for x, y in pairs:
+        expected = world.check_access(x, y, True)
+        mutual += expected
+        assert expected == (x in access_class and y in access_class and access_class[x] == access_class[y])
+    assert mutual > 0
+    assert world.get_access_classes() is access_class
@@ -0,0 +1,145 @@
+import random
+import zlib
+
+import pytest
+
+from iog_randomizer.randomizer.patch_writer import create_bps, create_ips, create_legacy_patch, get_patch_records
+
+
+# Applies an IPS patch to rom, growing it if a record writes past the end
+def apply_ips(rom: bytes, patch: bytes):
+    assert patch[:5] == b"PATCH" and patch[-3:] == b"EOF"
+    rom = bytearray(rom)
+    pos = 5
+    while pos < len(patch) - 3:
+        offset = int.from_bytes(patch[pos:pos + 3], "big")
+        length = int.from_bytes(patch[pos + 3:pos + 5], "big")
+        pos += 5
+        if length == 0:  # RLE record
+            length = int.from_bytes(patch[pos:pos + 2], "big")
+            data = patch[pos + 2:pos + 3] * length
+            pos += 3
+        else:
+            data = patch[pos:pos + length]
+            pos += length
+        if offset + length > len(rom):
+            rom += bytes(offset + length - len(rom))
+        rom[offset:offset + length] = data
+    return bytes(rom)
+
+
+# Applies a BPS patch to source, checking its checksums
+def apply_bps(source: bytes, patch: bytes):
+    assert patch[:4] == b"BPS1"
+    assert zlib.crc32(patch[:-4]) == int.from_bytes(patch[-4:], "little")
+    pos = 4
+
+    def read_number():
+        nonlocal pos
+        number, shift = 0, 1
+        while True:
+            byte = patch[pos]
+            pos += 1
+            number += (byte & 0x7F) * shift
+            if byte & 0x80:
+                return number
+            shift <<= 7
+            number += shift
+
+    assert read_number() == len(source)
+    target = bytearray(read_number())
+    metadata_size = read_number()
+    pos += metadata_size
+    output_offset = source_offset = target_offset = 0
+    while pos < len(patch) - 12:
+        action = read_number()
+        length = (action >> 2) + 1
+        if action & 3 == 0:  # SourceRead
+            target[output_offset:output_offset + length] = source[output_offset:output_offset + length]
+        elif action & 3 == 1:  # TargetRead
+            target[output_offset:output_offset + length] = patch[pos:pos + length]
+            pos += length
+        else:
+            delta = read_number()
+            delta = -(delta >> 1) if delta & 1 else delta >> 1
+            if action & 3 == 2:  # SourceCopy
+                source_offset += delta
+                target[output_offset:output_offset + length] = source[source_offset:source_offset + length]
+                source_offset += length
+            else:  # TargetCopy, which may overlap what it's writing
+                target_offset += delta
+                for i in range(length):
+                    target[output_offset + i] = target[target_offset + i]
+                target_offset += length
+        output_offset += length
+    assert output_offset == len(target)
+    assert zlib.crc32(source) == int.from_bytes(patch[-12:-8], "little")
+    assert zlib.crc32(target) == int.from_bytes(patch[-8:-4], "little")
+    return bytes(target)
+
+
+# Applies a legacy patch to rom
+def apply_legacy(rom: bytes, patch: list):
+    rom = bytearray(rom)
+    for record in patch:
+        end = record["address"] + len(record["data"])
+        if end > len(rom):
+            rom += bytes(end - len(rom))
+        rom[record["address"]:end] = bytes(record["data"])
+    return bytes(rom)
+
+
+# A 64KB "ROM" expanded to 128KB and patched the way asar does: changes in the original, some of
+# them written back unchanged, and new code in the expansion, whose blank rest no block covers
+@pytest.fixture
+def rom_pair():
+    rng = random.Random(1)
+    original = bytes(rng.randrange(256) for _ in range(0x10000))
+    base = original + bytes(0x10000)
+    patched = bytearray(base)
+    written_blocks = []
+    for offset, length in [(0x100, 4), (0x104, 2), (0x2000, 0x300), (0x8000, 1), (0xFFF0, 0x10),
+                           (0x12000, 0x40), (0x1F000, 0x20)]:
+        patched[offset:offset + length] = bytes(rng.randrange(256) for _ in range(length))
+        written_blocks.append([offset, length])
+    patched[0x2010:0x2018] = original[0x2010:0x2018]  # Written, but unchanged
+    written_blocks.append([0x500, 0x10])  # Written back as it was
+    patched[0x18000:0x18100] = b"\xff" * 0x100  # A fill asar wrote
+    written_blocks.append([0x18000, 0x100])
+    return original, base, bytes(patched), get_patch_records(original, bytes(patched), written_blocks, base)
+
+
+def test_ips_round_trip(rom_pair):
+    original, base, patched, records = rom_pair
+    assert apply_ips(original, create_ips(records)) == patched
+
+
+def test_ips_round_trip_with_copier_header(rom_pair):
+    original, base, patched, records = rom_pair
+    header = bytes(0x200)
+    assert apply_ips(header + original, create_ips(records, 0x200)) == header + patched
+
+
+def test_bps_round_trip(rom_pair):
+    original, base, patched, records = rom_pair
+    assert apply_bps(original, create_bps(original, patched, records)) == patched
+
+
+def test_legacy_round_trip(rom_pair):
+    original, base, patched, records = rom_pair
+    assert apply_legacy(original, create_legacy_patch(records)) == patched
+
+
+def test_records_skip_unchanged_bytes(rom_pair):
+    original, base, patched, records = rom_pair
+    for offset, length, data in records:
+        if offset + length <= len(original):
+            assert original[offset:offset + length] != patched[offset:offset + length]
+    assert not any(offset <= 0x500 < offset + length for offset, length, data in records)
+
+
+def test_long_records_split_for_ips():
+    original = bytes(0x100)
+    patched = original + bytes(range(256)) * 0x200  # A 128KB data record, past IPS's 64KB limit
+    records = get_patch_records(original, patched, [[0x100, len(patched) - 0x100]])
+    assert apply_ips(original, create_ips(records)) == patched
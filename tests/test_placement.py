@@ -0,0 +1,73 @@
+import random
+
+import pytest
+
+from iog_randomizer.randomizer.models.enums import Logic
+
+
+# Checks count_placed against a full scan of item_locations, for every item and for empty locations
+def assert_counts_match_scan(world):
+    counts = {}
+    for loc in world.item_locations:
+        item = world.item_locations[loc][3]
+        counts[item] = counts.get(item, 0) + 1
+    for item in set(world.item_pool) | set(counts) | {0}:
+        assert world.count_placed(item) == counts.get(item, 0), item
+
+
+# Checks that open_locations holds exactly the accessible, empty locations of each shuffled pool
+def assert_open_locations_match_scan(world):
+    for pool, open_locs in enumerate(world.open_locations[1:], 1):
+        expected = [loc for loc in world.item_locations if world.item_locations[loc][7] == pool
+                    and not world.item_locations[loc][2] and world.is_accessible(world.item_locations[loc][0])]
+        assert sorted(open_locs) == sorted(expected), pool
+
+
+def test_fill_and_unfill_keep_indices(make_world):
+    world = make_world()
+    world.initialize()
+    world.reset_progress(True)
+    for node in world.graph:  # Open every node, so each fill and unfill moves a location in or out of open_locations
+        world.graph[node].visited = True
+    for loc in world.item_locations:
+        if not world.item_locations[loc][2] and world.item_locations[loc][7]:
+            world.open_locations[world.item_locations[loc][7]].append(loc)
+    assert_counts_match_scan(world)
+    assert_open_locations_match_scan(world)
+
+    rng = random.Random(1)
+    pools = [pool for pool in range(1, world.item_pool_count) if world.open_locations[pool]]
+    filled = []
+    unfills = 0
+    for _ in range(300):
+        if filled and rng.random() < 0.3:
+            loc = filled.pop(rng.randrange(len(filled)))
+            item = world.item_locations[loc][3]
+            assert world.unfill_item(loc) == item
+            assert loc not in world.placement_log
+            unfills += 1
+        else:
+            pool = rng.choice(pools)
+            if not world.open_locations[pool]:
+                continue
+            loc = rng.choice(list(world.open_locations[pool]))
+            items = [item for item in world.item_pool if world.item_pool[item][0] > 0
+                     and world.get_pool_id(item=item) == pool and item not in world.item_locations[loc][4]]
+            if not items:
+                continue
+            item = rng.choice(items)
+            assert world.fill_item(item, loc)
+            assert loc not in world.open_locations[pool]
+            assert world.placement_log[loc] == [item, loc]
+            filled.append(loc)
+        assert_counts_match_scan(world)
+        assert_open_locations_match_scan(world)
+    assert filled and unfills
+
+
+@pytest.mark.parametrize("settings", [{}, {"logic": Logic.CHAOS}])
+def test_counts_match_after_randomize(make_world, settings):
+    world = make_world(**settings)
+    assert world.randomize()
+    assert_counts_match_scan(world)
+    assert list(world.placement_log) == [entry[1] for entry in world.placement_log.values()]
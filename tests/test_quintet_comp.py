@@ -0,0 +1,85 @@
+import random
+
+import pytest
+
+from iog_randomizer.randomizer.quintet_comp import compress, decompress
+
+
+# The original brute-force compressor, packing bits into a list rather than through bitstring
+def reference_compress(inBytes):
+    inBuffer = bytearray([0x20] * 256) + bytes(inBytes)
+    bits = []
+
+    def pack(value, bitCount):
+        bits.extend((value >> (bitCount - 1 - i)) & 1 for i in range(bitCount))
+
+    pack(len(inBytes) & 0xFF, 8)
+    pack(len(inBytes) >> 8, 8)
+    currentIndex = 256
+    while currentIndex < len(inBuffer):
+        bestIndex = 0
+        bestLength = 0
+        for i in range(256):
+            compareLimit = min(15, len(inBuffer) - currentIndex)
+            currentLength = 0
+            for j in range(compareLimit):
+                if inBuffer[currentIndex - 256 + i + j] == inBuffer[currentIndex + j]:
+                    currentLength += 1
+                else:
+                    break
+            if currentLength > bestLength:
+                bestIndex = currentIndex - 256 + i
+                bestLength = currentLength
+        if bestLength >= 2:
+            pack(0, 1)
+            pack((bestIndex + 0xEF) & 0xFF, 8)
+            pack(bestLength - 2, 4)
+            currentIndex += bestLength
+        else:
+            pack(1, 1)
+            pack(inBuffer[currentIndex], 8)
+            currentIndex += 1
+
+    bits.extend([0] * (-len(bits) % 8))
+    return bytes(int("".join(map(str, bits[i:i + 8])), 2) for i in range(0, len(bits), 8))
+
+
+# Returns random data with enough repetition to exercise pastcopies, including runs and spaces
+def sample_data(rng, size):
+    alphabet = rng.sample(range(256), rng.choice([2, 4, 16, 256])) + [0x20]
+    data = bytearray()
+    while len(data) < size:
+        roll = rng.random()
+        if roll < 0.3 and data:
+            start = rng.randrange(max(0, len(data) - 300), len(data))
+            data += data[start:start + rng.randint(1, 40)]
+        elif roll < 0.4:
+            data += bytes([rng.choice(alphabet)]) * rng.randint(1, 50)
+        else:
+            data.append(rng.choice(alphabet))
+    return bytes(data[:size])
+
+
+SAMPLES = [b"", b"A", b" " * 40, bytes(range(256)) * 2] + \
+          [sample_data(random.Random(seed), random.Random(seed).randint(1, 1200)) for seed in range(25)]
+
+
+@pytest.mark.parametrize("data", SAMPLES)
+def test_default_mode_matches_original(data):
+    assert compress(data) == reference_compress(data)
+
+
+@pytest.mark.parametrize("optimal", [False, True])
+@pytest.mark.parametrize("data", SAMPLES)
+def test_round_trip(data, optimal):
+    assert decompress(compress(data, optimal)) == data
+
+
+@pytest.mark.parametrize("data", SAMPLES)
+def test_optimal_is_never_larger(data):
+    assert len(compress(data, True)) <= len(compress(data))
+
+
+def test_rejects_oversized_input():
+    with pytest.raises(ValueError):
+        compress(bytes(0x10000))